@@ -1,41 +1,130 @@
 from PySide6.QtCore import QObject, Signal, Slot
 from PySide6.QtWidgets import QFileDialog
-from analysisworker import AnalysisWorker
-import utils
+import threading, time, utils, instrumentation
+
+# The analysis modules pull in matplotlib, pandas and cv2, so they are only imported on first
+# use or by warm_up() once the window is showing.
 
 class AnalysisHandler(QObject):
     csvUpdated = Signal(str)
     videoUpdated = Signal(str)
+    progressUpdated = Signal(str, float, float)
+    runningChanged = Signal(bool)
 
     def __init__(self):
         super().__init__()
         self.worker = None
+        # Run options changed so far, the pipeline's DEFAULT_OPTIONS fill in the rest.
+        self.options = {}
+
+    def warm_up(self):
+        threading.Thread(target=self.import_analysis, daemon=True).start()
+
+    def import_analysis(self):
+        started = time.perf_counter_ns()
+        import analysisworker
+        ended = time.perf_counter_ns()
+        instrumentation.record("startup.warm_up", started, ended)
+        utils.log("Analysis Handler", f"Analysis modules loaded in the background in {(ended - started) / 1e6:.0f}ms")
 
     @Slot(str, str)
     def run_analysis(self, csv_path, video_path):
         if self.worker and self.worker.isRunning():
             utils.log("Analysis Handler", "Analysis Worker is already running")
             return
-        
-        self.worker = AnalysisWorker(csv_path, video_path)
+
+        from analysisworker import AnalysisWorker
+        self.worker = AnalysisWorker(csv_path, video_path, options=self.options)
+        self.worker.progressUpdated.connect(self.progressUpdated)
+        self.worker.started.connect(lambda: self.runningChanged.emit(True))
+        self.worker.finished.connect(lambda: self.runningChanged.emit(False))
         self.worker.start()
 
+    @Slot()
+    def cancel_analysis(self):
+        if self.worker and self.worker.isRunning():
+            utils.log("Analysis Handler", "Cancelling analysis")
+            self.worker.stop()
+
+    @Slot(int)
+    def set_workers(self, workers):
+        self.options = dict(self.options, workers=max(1, workers))
+        utils.log("Analysis Handler", f"Analysis workers set to {self.options['workers']}")
+
+    @Slot(str)
+    def set_output_format(self, output_format):
+        self.options = dict(self.options, output_format=output_format)
+        utils.log("Analysis Handler", f"Processed data format set to {output_format}")
+
+    def update_plan(self, **changes):
+        self.options = dict(self.options, plan=dict(self.options.get("plan", {}), **changes))
+
+    def update_postprocessing(self, **changes):
+        self.options = dict(self.options, postprocessing=dict(self.options.get("postprocessing", {}), **changes))
+
+    @Slot(str, bool)
+    def set_output(self, output, enabled):
+        from analysispipeline import DEFAULT_PLAN
+        plan = self.options.get("plan", {})
+        outputs = [o for o in plan.get("outputs", DEFAULT_PLAN["outputs"]) if o != output]
+        if enabled:
+            outputs.append(output)
+        self.update_plan(outputs=tuple(outputs))
+        utils.log("Analysis Handler", f"Outputs set to {', '.join(outputs) or 'none'}")
+
+    @Slot(float)
+    def set_video_scale(self, scale):
+        self.update_plan(scale=scale)
+        utils.log("Analysis Handler", f"Video scale set to {scale:g}")
+
+    @Slot(int)
+    def set_plot_dpi(self, dpi):
+        self.update_plan(dpi=dpi)
+        utils.log("Analysis Handler", f"Plot DPI set to {dpi}")
+
+    @Slot(int)
+    def set_graph_every(self, frames):
+        self.options = dict(self.options, graph_every=max(1, frames))
+        utils.log("Analysis Handler", f"Combined graph updated every {self.options['graph_every']} frames")
+
+    @Slot(bool)
+    def set_windowed(self, enabled):
+        from burstdetection import DEFAULT_WINDOWS
+        self.options = dict(self.options, windowed=dict(DEFAULT_WINDOWS) if enabled else None)
+        utils.log("Analysis Handler", f"Burst windowed analysis {'enabled' if enabled else 'disabled'}")
+
+    @Slot(bool)
+    def set_tracking(self, enabled):
+        from edgetracker import DEFAULT_TRACKING
+        self.options = dict(self.options, tracking=dict(DEFAULT_TRACKING) if enabled else None)
+        utils.log("Analysis Handler", f"Edge tracking {'enabled' if enabled else 'disabled'}")
+
+    @Slot(bool)
+    def set_frame_store(self, enabled):
+        from framestore import DEFAULT_STORE
+        self.options = dict(self.options, frame_store=dict(DEFAULT_STORE) if enabled else None)
+        utils.log("Analysis Handler", f"Frame store {'enabled' if enabled else 'disabled'}")
+
+    @Slot(str)
+    def set_filter(self, name):
+        # "none", "median" or "savgol" from the UI.
+        self.update_postprocessing(filter=None if name == "none" else name)
+        utils.log("Analysis Handler", f"Smoothing filter set to {name}")
+
+    @Slot(float)
+    def set_calibration(self, mm_per_px):
+        # 0 keeps the diameters in pixels.
+        self.update_postprocessing(mm_per_px=mm_per_px if mm_per_px > 0 else None)
+        utils.log("Analysis Handler", f"Calibration set to {mm_per_px:g} mm/px" if mm_per_px > 0 else "Calibration cleared")
+
     @Slot()
     def select_folder(self):
         folder = QFileDialog.getExistingDirectory(None, "Select Folder Containing Video and CSV", "data")
         if not folder:
             return
 
-        import os
-        csv_path = None
-        video_path = None
-
-        for file in os.listdir(folder):
-            lower = file.lower()
-            if lower.endswith(".csv"):
-                csv_path = os.path.join(folder, file)
-            elif lower.endswith(".mp4"):
-                video_path = os.path.join(folder, file)
+        from analysispipeline import find_recording
+        csv_path, video_path = find_recording(folder)
 
         if csv_path:
             utils.log("Analysis Handler", f"Successfully selected CSV: {csv_path}")
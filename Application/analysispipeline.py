@@ -0,0 +1,699 @@
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from graphrenderer import GraphRenderer
+from measurement import DEFAULT_PARAMS, measure_frame, draw_measurement, measure_range, split_ranges, init_worker
+from burstdetection import find_burst, find_jumps, detail_windows, fill_gaps
+from edgetracker import EdgeTracker
+from framestore import FrameStoreWriter, open_store, measure_stored_range
+from postprocess import DEFAULT_POSTPROCESS, postprocess, pressure_path, compliance, merge_views
+from multicamera import camera_number, view_paths, view_times, measure_view
+import concurrent.futures, cv2, os, time, utils, warnings, multiprocessing, measurementcache, instrumentation, datastore, videoio
+
+def find_recording(folder):
+    csv_paths = []
+    video_paths = []
+
+    for file in sorted(os.listdir(folder)):
+        path = os.path.join(folder, file)
+        if not os.path.isfile(path):
+            continue
+        lower = file.lower()
+        if lower.endswith((".csv", datastore.CHUNKED_EXT)):
+            csv_paths.append(path)
+        elif videoio.is_video(lower):
+            video_paths.append(path)
+
+    # The per-frame _DATA file wins over other tables such as the raw _PRESSURE log.
+    data_paths = [p for p in csv_paths if os.path.splitext(p)[0].lower().endswith("_data")]
+    csv_path = (data_paths or csv_paths or [None])[-1]
+    # Multi-camera recordings are opened through their primary view, CAM1.
+    video_path = min(reversed(video_paths), key=camera_number) if video_paths else None
+    return csv_path, video_path
+
+# Outputs a run can produce and the output_paths() entries behind each. Measuring always runs,
+# everything else only when its output is selected.
+OUTPUT_FILES = {
+    "csv": ("processed_csv",),
+    "plots": ("stress_strain_png", "compliance_png", "pressure_diameter_png"),
+    "video": ("processed_video",),
+    "combined": ("combined_video",)
+}
+OUTPUTS = tuple(OUTPUT_FILES)
+DEFAULT_PLAN = {"outputs": OUTPUTS, "scale": 1.0, "dpi": 300}
+
+# Everything a run is set up with besides the recording, built once by the UI or batch and passed down as one dict.
+DEFAULT_OPTIONS = {
+    "graph_every": 1,
+    "workers": 1,
+    "params": DEFAULT_PARAMS,
+    "annotate": True,
+    "output_format": "csv",
+    "plan": DEFAULT_PLAN,
+    "windowed": None,
+    "tracking": None,
+    "frame_store": None,
+    "postprocessing": DEFAULT_POSTPROCESS
+}
+
+def run_options(options):
+    # A misspelled option is an error rather than silently left at its default.
+    unknown = set(options) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown analysis options: {', '.join(sorted(unknown))}")
+    return dict(DEFAULT_OPTIONS, **options)
+
+class AnalysisCancelled(Exception):
+    pass
+
+def partial_path(path):
+    # Videos are written under a temporary name and only renamed once complete.
+    root, ext = os.path.splitext(path)
+    return f"{root}.partial{ext}"
+
+class AnalysisPipeline:
+    def __init__(self, csv_path, video_path, options=DEFAULT_OPTIONS, progress=None):
+        options = run_options(options)
+        params, windowed, tracking = options["params"], options["windowed"], options["tracking"]
+        self.csv_path = csv_path
+        self.video_path = video_path
+        self.params = params
+        self.plan = dict(DEFAULT_PLAN, **options["plan"])
+        self.windowed = windowed
+        self.tracking = tracking
+        self.frame_store = options["frame_store"]
+        self.postprocessing = dict(DEFAULT_POSTPROCESS, **options["postprocessing"])
+        # The other camera views of a multi-camera recording, measured alongside the primary one.
+        self.views = view_paths(video_path)[1:]
+        self.view_pool = None
+        self.view_cancel = None
+        # Windowed and tracked runs measure a different series, so they get their own cache entry.
+        self.measure_key = dict(params)
+        if windowed:
+            self.measure_key["windows"] = windowed
+        if tracking:
+            self.measure_key["tracking"] = tracking
+        self.graph_every = options["graph_every"]
+        self.annotate = options["annotate"]
+        self.output_format = datastore.table_format(options["output_format"])
+        self.workers = max(1, int(options["workers"]))
+        self.progress = progress
+        self.running = True
+        self.stage = None
+        self.stage_started = 0.0
+        self.last_report = 0.0
+        self.partials = []
+        self.store_writer = None
+        warnings.filterwarnings("ignore")
+
+    def output_paths(self):
+        processed_dir = os.path.join(os.path.dirname(self.video_path), "processed")
+        video_name = os.path.splitext(os.path.basename(self.video_path))[0] + "_PROCESSED.mp4"
+        csv_stem = os.path.splitext(os.path.basename(self.csv_path))[0]
+        csv_name = f"{csv_stem}_PROCESSED.{self.output_format}"
+        return {
+            "processed_dir": processed_dir,
+            "processed_csv": os.path.join(processed_dir, csv_name),
+            "processed_video": os.path.join(processed_dir, video_name),
+            "combined_video": os.path.join(processed_dir, "Combined_Video.mp4"),
+            "stress_strain_png": os.path.join(processed_dir, "Stress-Strain_Plot.png"),
+            "compliance_png": os.path.join(processed_dir, "Compliance.png"),
+            "pressure_diameter_png": os.path.join(processed_dir, "Pressure-Diameter.png")
+        }
+
+    def parallel(self):
+        # Tracking follows the edges from one frame to the next, so it always runs serially.
+        return self.workers > 1 and not self.tracking
+
+    def frames_from(self, store):
+        # Stored frames stand in for decoding, except when tracking as the tracker searches whole frames.
+        return store is not None and not self.tracking
+
+    def start_store(self, vid, processed_dir, store):
+        # Frames are only stored when asked for and not already held by a current store.
+        if not self.frame_store or store is not None:
+            return None
+        shape = (int(vid.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(vid.get(cv2.CAP_PROP_FRAME_WIDTH)))
+        self.store_writer = FrameStoreWriter(processed_dir, self.video_path, shape, int(vid.get(cv2.CAP_PROP_FRAME_COUNT)), self.params, self.frame_store)
+        return self.store_writer
+
+    def store_frame(self, vid, frame):
+        if self.store_writer is not None:
+            with instrumentation.span("analysis.store_frame"):
+                self.store_writer.add(frame, vid.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+
+    def finish_store(self):
+        writer, self.store_writer = self.store_writer, None
+        return writer.close() if writer is not None else None
+
+    def measurer(self, params=None):
+        # Frame to (diameter, points), stateful when tracking.
+        params = params or self.params
+        if self.tracking:
+            return EdgeTracker(params, self.tracking).measure
+        return lambda frame: measure_frame(frame, params)
+
+    def wants(self, output):
+        return output in self.plan["outputs"]
+
+    def selected_outputs(self):
+        paths = self.output_paths()
+        return [paths[key] for output in self.plan["outputs"] for key in OUTPUT_FILES[output]]
+
+    def output_keys(self):
+        # What each output is generated from, so changing a setting only regenerates the outputs it affects.
+        data = dict(self.measure_key, postprocessing=self.postprocessing)
+        video = dict(self.measure_key, scale=self.plan["scale"], annotate=self.annotate)
+        return {
+            "csv": data,
+            "plots": dict(data, dpi=self.plan["dpi"]),
+            "video": video,
+            "combined": dict(data, **video, graph_every=self.graph_every)
+        }
+
+    def outputs_current(self, processed_dir, outputs):
+        paths, keys = self.output_paths(), self.output_keys()
+        return all(measurementcache.outputs_current(processed_dir, [paths[key] for key in OUTPUT_FILES[output]], self.video_path, keys[output]) for output in outputs)
+
+    def mark_outputs(self, processed_dir, outputs):
+        paths, keys = self.output_paths(), self.output_keys()
+        for output in outputs:
+            measurementcache.mark_outputs(processed_dir, [paths[key] for key in OUTPUT_FILES[output]], self.video_path, keys[output])
+
+    def is_up_to_date(self):
+        # Every selected output exists, is newer than the inputs and was generated with the current settings.
+        outputs = self.selected_outputs()
+        newest_input = max(os.path.getmtime(path) for path in [self.csv_path, self.video_path] + [p for _, p in self.views])
+        if not all(os.path.exists(path) and os.path.getmtime(path) >= newest_input for path in outputs):
+            return False
+        return self.outputs_current(self.output_paths()["processed_dir"], self.plan["outputs"])
+
+    def report(self, stage, done, total):
+        now = time.perf_counter()
+        if stage != self.stage:
+            self.stage = stage
+            self.stage_started = now
+            self.last_report = 0.0
+
+        # Throttled so per-frame reporting doesn't flood the UI.
+        if self.progress is None or (done < total and now - self.last_report < 0.1):
+            return
+        self.last_report = now
+
+        fraction = min(done / total, 1.0) if total > 0 else 0.0
+        elapsed = now - self.stage_started
+        eta = elapsed * (1 - fraction) / fraction if fraction > 0 else -1.0
+        self.progress(stage, fraction, eta)
+
+    def check(self):
+        if not self.running:
+            raise AnalysisCancelled()
+
+    def discard_partials(self):
+        for path in self.partials:
+            if os.path.exists(path):
+                os.remove(path)
+                utils.log("Analysis Pipeline", f"Removed incomplete output {path}")
+        self.partials = []
+
+    def run(self):
+        try:
+            return self.analyse()
+        except AnalysisCancelled:
+            utils.log("Analysis Pipeline", "Analysis Stopped, previous outputs were left untouched")
+            self.report("Cancelled", 0, 1)
+            return False
+        finally:
+            self.discard_partials()
+            if self.view_pool is not None:
+                # The view workers stop at their next frame rather than measuring their whole video.
+                self.view_cancel.set()
+                self.view_pool.shutdown(wait=False, cancel_futures=True)
+                self.view_pool = None
+            if self.store_writer is not None:
+                self.store_writer.discard()
+                self.store_writer = None
+
+    def analyse(self):
+        utils.log("Analysis Pipeline", "Started Analysis")
+        self.report("Loading", 0, 1)
+        df = datastore.load_table(self.csv_path)
+        utils.log("Analysis Pipeline", "CSV Loaded")
+
+        vid = videoio.open_capture(self.video_path)
+        if not vid.isOpened():
+            raise RuntimeError(f"Failed to open video {self.video_path}")
+
+        fps = vid.get(cv2.CAP_PROP_FPS)
+        width = int(vid.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(vid.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        utils.log("Analysis Pipeline", f"FPS: {fps}")
+        utils.log("Analysis Pipeline", f"Resolution: {width}x{height}")
+        utils.log("Analysis Pipeline", f"Total Frames: {total_frames}")
+
+        outputs = self.output_paths()
+        processed_dir = outputs["processed_dir"]
+        os.makedirs(processed_dir, exist_ok=True)
+
+        combined_video_path = outputs["combined_video"]
+        stress_strain_png = outputs["stress_strain_png"]
+        compliance_png = outputs["compliance_png"]
+        pressure_diameter_png = outputs["pressure_diameter_png"]
+        output_video = outputs["processed_video"]
+        output_csv = outputs["processed_csv"]
+        view_futures = self.start_views(processed_dir)
+        output_video = output_video if self.wants("video") else None
+        combined_video_path = combined_video_path if self.wants("combined") else None
+        video_outputs = [output for output in ("video", "combined") if self.wants(output)]
+
+        try:
+            # Reuse the measured series from an earlier run with the same video and parameters.
+            measurements = measurementcache.load(processed_dir, self.video_path, self.measure_key)
+            cached = measurements is not None
+            store = open_store(processed_dir, self.video_path, self.params)
+            if cached:
+                utils.log("Analysis Pipeline", f"Loaded {len(measurements)} cached measurements")
+                # A store asked for but missing is still built, by the rendering pass if the videos are redone.
+                if self.outputs_current(processed_dir, video_outputs) and self.start_store(vid, processed_dir, store):
+                    store = self.store_frames(vid, total_frames)
+            elif self.windowed or self.parallel() or self.wants("combined") or not self.wants("video"):
+                # The combined video's graph is drawn from the processed series, so it needs every frame measured first.
+                # Windowed and parallel measuring read out of order, so the store is filled in a pass of its own first.
+                if (self.windowed or self.parallel()) and self.start_store(vid, processed_dir, store):
+                    store = self.store_frames(vid, total_frames)
+                    vid = videoio.seek(vid, self.video_path, 0)
+                if self.windowed:
+                    measurements = self.measure_windowed(df, fps, total_frames, store)
+                elif self.parallel():
+                    measurements = self.measure_parallel(total_frames, store)
+                else:
+                    measurements = self.measure_serial(vid, total_frames, store, processed_dir)
+                    if self.wants("video") or self.wants("combined"):
+                        vid = videoio.seek(vid, self.video_path, 0)
+                utils.log("Analysis Pipeline", f"Measured {len(measurements)} frames")
+                measurementcache.save(processed_dir, self.video_path, self.measure_key, measurements)
+            processed = self.process(df, measurements, fps, view_futures) if measurements is not None else None
+
+            # The videos are kept if generated from the same measurements and settings, see output_keys.
+            if measurements is not None and self.outputs_current(processed_dir, video_outputs):
+                if video_outputs:
+                    utils.log("Analysis Pipeline", "Processed videos are up to date")
+            else:
+                if measurements is None or cached:
+                    self.start_store(vid, processed_dir, store)
+                measured = self.render_videos(vid, processed, measurements, output_video, combined_video_path)
+                self.finish_store()
+                if measurements is None:
+                    measurementcache.save(processed_dir, self.video_path, self.measure_key, measured)
+                    measurements = measured
+                self.mark_outputs(processed_dir, video_outputs)
+        finally:
+            vid.release()
+
+        utils.log("Analysis Pipeline", "Video Processing Completed")
+        utils.log("Analysis Pipeline", "Processing Outputs. Please wait")
+
+        df = processed if processed is not None else self.process(df, measurements, fps, view_futures)
+
+        self.check()
+        if self.wants("csv"):
+            self.report("Saving data", 0, 1)
+            with instrumentation.span("analysis.write_csv"):
+                datastore.save_table(df, output_csv)
+            self.mark_outputs(processed_dir, ["csv"])
+            utils.log("Analysis Pipeline", f"Processed CSV: {output_csv}")
+
+        # Each plot is a single savefig, so cancellation is checked between them.
+        plots = [
+            ("analysis.plot_stress_strain", self.plot_stress_strain, stress_strain_png),
+            ("analysis.plot_compliance", self.plot_compliance, compliance_png),
+            ("analysis.plot_pressure_diameter", self.plot_pressure_diameter, pressure_diameter_png)
+        ] if self.wants("plots") else []
+        for i, (name, plot, path) in enumerate(plots):
+            self.check()
+            self.report("Plotting", i, len(plots))
+            with instrumentation.span(name):
+                plot(df, path)
+        if plots:
+            self.mark_outputs(processed_dir, ["plots"])
+
+        if output_video:
+            utils.log("Analysis Pipeline", f"Processed Video: {output_video}")
+        if combined_video_path:
+            utils.log("Analysis Pipeline", f"Combined Video: {combined_video_path}")
+        if plots:
+            utils.log("Analysis Pipeline", f"Stress-Strain PNG: {stress_strain_png}")
+            utils.log("Analysis Pipeline", f"Compliance PNG: {compliance_png}")
+            utils.log("Analysis Pipeline", f"Pressure-Diameter PNG: {pressure_diameter_png}")
+        utils.log("Analysis Pipeline", "Analysis Completed")
+        self.report("Done", 1, 1)
+        return True
+
+    def plot_stress_strain(self, df, path):
+        # Stress-Strain Graph.
+        plt.figure(figsize=(8, 5))
+        plt.plot(df["Strain"], df["Stress [kPa]"], color='red', linewidth=2)
+        plt.xlabel(r"Circumferential Strain, $\epsilon_\theta$")
+        plt.ylabel(r"Hoop Stress, $\sigma_\theta$ [kPa")
+        plt.title("Stress vs Strain")
+        plt.grid(True)
+        plt.tight_layout()
+        plt.savefig(path, dpi=self.plan["dpi"])
+        plt.close()
+
+    def plot_compliance(self, df, path):
+        # Circumferential Compliance Graph.
+        plt.figure(figsize=(8, 5))
+        plt.plot(df["Elapsed Time [s]"], compliance(df["Strain"], df["Stress [kPa]"]), color='green', linewidth=2)
+        plt.xlabel("Elapsed Time [s]")
+        plt.ylabel(r"Circumferential Compliance, C$_\theta$ [1/kPa]")
+        plt.title("Circumferential Compliance vs Time")
+        plt.grid(True)
+        plt.tight_layout()
+        plt.savefig(path, dpi=self.plan["dpi"])
+        plt.close()
+
+    def plot_pressure_diameter(self, df, path):
+        # Diameter and Pressure vs. Time Graph.
+        fig, ax1 = plt.subplots(figsize=(8, 5))
+        ax1.set_xlabel("Elapsed Time [s]")
+        ax1.set_ylabel("Pressure [kPa]", color='orange')
+        ax1.plot(df["Elapsed Time [s]"], df["Pressure [kPa]"], color='orange', linewidth=2, label='Pressure')
+        ax1.tick_params(axis='y', labelcolor='orange')
+
+        diameter = "Diameter [mm]" if "Diameter [mm]" in df else "Diameter [px]"
+        ax2 = ax1.twinx()
+        ax2.set_ylabel(diameter, color='blue')
+        ax2.plot(df["Elapsed Time [s]"], df[diameter], color='blue', linewidth=2, label='Diameter')
+        ax2.tick_params(axis='y', labelcolor='blue')
+
+        plt.title("Presusre and Diameter vs Time")
+        ax1.grid(True)
+        fig.tight_layout()
+        plt.savefig(path, dpi=self.plan["dpi"])
+        plt.close()
+
+    def render_videos(self, vid, processed, measurements, output_video, combined_video_path):
+        # Either video may be None when it isn't part of the plan.
+        fps = vid.get(cv2.CAP_PROP_FPS)
+        width = int(vid.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(vid.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(vid.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        # Output size, kept even for the encoder.
+        scale = self.plan["scale"]
+        out_width, out_height = max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+        resize = (out_width, out_height) != (width, height)
+
+        writer = None
+        if output_video:
+            writer, path = videoio.open_writer(partial_path(output_video), fps, (out_width, out_height), "output")
+            self.partials.append(path)
+
+        # Combined video w/ video & graph.
+        combined_writer = None
+        graph = None
+        if combined_video_path:
+            graph_width, graph_height = max(2, int(640 * scale) // 2 * 2), out_height
+            combined_width, combined_height = out_width + graph_width, out_height
+            combined_writer, path = videoio.open_writer(partial_path(combined_video_path), fps, (combined_width, combined_height), "output")
+            self.partials.append(path)
+
+            # The graph follows the processed series, indexed by frame, so it matches the CSV and plots.
+            stress, strain = processed["Stress [kPa]"], processed["Strain"]
+            graph = GraphRenderer(
+                size=(graph_width, graph_height),
+                ylim=(stress.min(), stress.max() * 1.1),
+                every=self.graph_every
+            )
+            graph_img = graph.image
+
+        measured = []
+        frame_index = 0
+        # The overlay is only drawn when a video in the plan shows it.
+        overlay = self.annotate and (writer is not None or combined_writer is not None)
+
+        stage = "Measuring and rendering" if measurements is None else "Rendering"
+        measure = self.measurer()
+        try:
+            while True:
+                self.check()
+                with instrumentation.span("analysis.decode"):
+                    ret, frame = vid.read()
+                if not ret:
+                    break
+                self.store_frame(vid, frame)
+
+                # Measure as frames arrive, or replay cached/parallel measurements.
+                if measurements is None:
+                    with instrumentation.span("analysis.process_frame"):
+                        diameter, points = measure(frame)
+                elif frame_index < len(measurements):
+                    diameter, points = measurements[frame_index]
+                else:
+                    break
+
+                with instrumentation.span("analysis.annotate"):
+                    processed_frame = draw_measurement(frame, diameter, points, self.params) if overlay else frame
+                    if resize:
+                        processed_frame = cv2.resize(processed_frame, (out_width, out_height), interpolation=cv2.INTER_AREA)
+                if writer is not None:
+                    with instrumentation.span("analysis.write_processed"):
+                        writer.write(processed_frame)
+                measured.append((diameter, points))
+
+                if graph is not None:
+                    # Frames outside the recorded pressure have no row and keep the graph as it is.
+                    if frame_index in stress.index:
+                        # Only the new segment is drawn, the axes grow with headroom as needed.
+                        with instrumentation.span("analysis.plot"):
+                            graph_img = graph.add(strain[frame_index], stress[frame_index])
+
+                    # Combine video frame and graph side by side.
+                    with instrumentation.span("analysis.write_combined"):
+                        combined_writer.write(np.hstack((processed_frame, graph_img)))
+                frame_index += 1
+                self.report(stage, frame_index, total_frames)
+        finally:
+            for video_writer in (writer, combined_writer):
+                if video_writer is not None:
+                    video_writer.release()
+
+        # Only complete videos replace the previous outputs.
+        for path in (output_video, combined_video_path):
+            if path:
+                os.replace(partial_path(path), path)
+        self.partials = []
+        return measured
+
+    def process(self, df, measurements, fps, view_futures):
+        # Frames are placed on the recording's clock and matched with the raw pressure log where there is one.
+        self.check()
+        raw_pressure = pressure_path(self.csv_path)
+        with instrumentation.span("analysis.postprocess"):
+            pressure = datastore.load_table(raw_pressure) if raw_pressure else None
+            df = postprocess(df, [d for d, _ in measurements], fps, self.postprocessing, pressure)
+        if view_futures:
+            views = self.collect_views(view_futures)
+            with instrumentation.span("analysis.merge_views"):
+                df = merge_views(df, view_paths(self.video_path)[0][0], views, self.postprocessing)
+        return df
+
+    def start_views(self, processed_dir):
+        # One process per further view, each measuring its whole video while the primary view is processed.
+        if not self.views:
+            return []
+        utils.log("Analysis Pipeline", f"Measuring {len(self.views)} more camera views: {', '.join(name for name, _ in self.views)}")
+        self.view_pool, self.view_cancel = self.start_pool(len(self.views))
+        return [(name, path, self.view_pool.submit(measure_view, path, processed_dir, self.params)) for name, path in self.views]
+
+    def collect_views(self, view_futures):
+        # [(name, times, diameters)] once every view is measured, checking for cancellation meanwhile.
+        self.wait_for([future for _, _, future in view_futures], "Measuring views")
+        self.view_pool.shutdown()
+        self.view_pool = None
+
+        views = []
+        for name, path, future in view_futures:
+            fps, measurements = future.result()
+            views.append((name, view_times(path, len(measurements), fps), [d for d, _ in measurements]))
+        return views
+
+    def measure_serial(self, vid, total_frames, store=None, processed_dir=None):
+        # Measurement only, for plans without any video output or ahead of drawing the combined video.
+        measurements = []
+        if self.frames_from(store):
+            for index in range(len(store)):
+                self.check()
+                with instrumentation.span("analysis.process_frame"):
+                    measurements.append(store.measure(index, self.params))
+                self.report("Measuring", index + 1, len(store))
+            return measurements
+
+        self.start_store(vid, processed_dir, store)
+        measure = self.measurer()
+        while True:
+            self.check()
+            with instrumentation.span("analysis.decode"):
+                ret, frame = vid.read()
+            if not ret:
+                break
+            self.store_frame(vid, frame)
+            with instrumentation.span("analysis.process_frame"):
+                measurements.append(measure(frame))
+            self.report("Measuring", len(measurements), total_frames)
+        self.finish_store()
+        return measurements
+
+    def store_frames(self, vid, total_frames):
+        # Decodes the whole video into the store ahead of measuring from it.
+        count = 0
+        while True:
+            self.check()
+            with instrumentation.span("analysis.decode"):
+                ret, frame = vid.read()
+            if not ret:
+                break
+            self.store_frame(vid, frame)
+            count += 1
+            self.report("Storing frames", count, total_frames)
+        return self.finish_store()
+
+    def measure_windowed(self, df, fps, total_frames, store=None):
+        # Own capture, as the second pass seeks around and the rendering pass reads from the start.
+        windows = self.windowed
+        detail_params = dict(self.params, scanlines=max(windows["scanlines"], self.params["scanlines"]), subpixel=windows["subpixel"])
+        if self.frames_from(store):
+            return self.measure_windowed_stored(df, fps, store, detail_params)
+
+        vid = videoio.open_capture(self.video_path)
+        try:
+            # First pass: every stride-th frame at normal detail. The rest are only grabbed, which still decodes them as
+            # the codec needs every frame for the next one but skips the conversion. Most of the saving is the measuring.
+            sampled = {}
+            index = 0
+            while True:
+                self.check()
+                if index % windows["stride"] == 0:
+                    ret, frame = vid.read()
+                    if not ret:
+                        break
+                    with instrumentation.span("analysis.process_frame"):
+                        sampled[index] = measure_frame(frame, self.params)
+                elif not vid.grab():
+                    break
+                index += 1
+                self.report("Locating events", index, total_frames)
+            total_frames = index
+
+            # Events are diameter jumps in the sample plus the pressure drop, _DATA rows line up with frames.
+            frames = sorted(sampled)
+            events = find_jumps(frames, [sampled[i][0] for i in frames])
+            burst = find_burst(df["Pressure [kPa]"])
+            if burst is not None:
+                utils.log("Analysis Pipeline", f"Burst detected at frame {burst}")
+                events.append(burst)
+            ranges = detail_windows(events, fps, total_frames, windows)
+
+            # Second pass: every frame inside the windows in full detail.
+            detailed = sum(stop - start for start, stop in ranges)
+            utils.log("Analysis Pipeline", f"Measuring {detailed} of {total_frames} frames in detail around {len(events)} events")
+            done = 0
+            for start, stop in ranges:
+                vid = videoio.seek(vid, self.video_path, start)
+                measure = self.measurer(detail_params)
+                for index in range(start, stop):
+                    self.check()
+                    ret, frame = vid.read()
+                    if not ret:
+                        break
+                    with instrumentation.span("analysis.process_frame"):
+                        sampled[index] = measure(frame)
+                    done += 1
+                    self.report("Measuring events", done, detailed)
+        finally:
+            vid.release()
+
+        return fill_gaps(total_frames, sampled)
+
+    def measure_windowed_stored(self, df, fps, store, detail_params):
+        # Same two passes over the stored frames, which need no grabbing or seeking.
+        windows = self.windowed
+        total_frames = len(store)
+        sampled = {}
+        for index in range(0, total_frames, windows["stride"]):
+            self.check()
+            with instrumentation.span("analysis.process_frame"):
+                sampled[index] = store.measure(index, self.params)
+            self.report("Locating events", index + 1, total_frames)
+
+        frames = sorted(sampled)
+        events = find_jumps(frames, [sampled[i][0] for i in frames])
+        burst = find_burst(df["Pressure [kPa]"])
+        if burst is not None:
+            utils.log("Analysis Pipeline", f"Burst detected at frame {burst}")
+            events.append(burst)
+        ranges = detail_windows(events, fps, total_frames, windows)
+
+        detailed = sum(stop - start for start, stop in ranges)
+        utils.log("Analysis Pipeline", f"Measuring {detailed} of {total_frames} stored frames in detail around {len(events)} events")
+        done = 0
+        for start, stop in ranges:
+            for index in range(start, min(stop, total_frames)):
+                self.check()
+                with instrumentation.span("analysis.process_frame"):
+                    sampled[index] = store.measure(index, detail_params)
+                done += 1
+                self.report("Measuring events", done, detailed)
+        return fill_gaps(total_frames, sampled)
+
+    def start_pool(self, workers):
+        # Spawned worker processes sharing an event that stops their ranges part-way when set.
+        context = multiprocessing.get_context("spawn")
+        cancel = context.Event()
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker, initargs=(cancel,))
+        return pool, cancel
+
+    def wait_for(self, futures, stage, count=lambda future: 1, total=None):
+        # Polls so a cancel is noticed within 0.1s rather than once a whole range has finished.
+        pending = set(futures)
+        done = 0
+        while pending:
+            self.check()
+            finished, pending = concurrent.futures.wait(pending, timeout=0.1)
+            done += sum(count(future) for future in finished)
+            self.report(stage, done, len(futures) if total is None else total)
+
+    def measure_parallel(self, total_frames, store=None):
+        # Each worker process opens its own capture and seeks to its range of frames, or maps the stored frames.
+        if store is not None:
+            total_frames = len(store)
+        ranges = split_ranges(total_frames, self.workers)
+        utils.log("Analysis Pipeline", f"Measuring {len(ranges)} ranges on {self.workers} workers")
+
+        pool, cancel = self.start_pool(self.workers)
+        try:
+            if store is not None:
+                futures = [pool.submit(measure_stored_range, store.path, store.meta_path, start, stop, self.params) for start, stop in ranges]
+            else:
+                futures = [pool.submit(measure_range, self.video_path, start, stop, self.params) for start, stop in ranges]
+            self.wait_for(futures, "Measuring", lambda future: len(future.result()[1]), total_frames)
+        except AnalysisCancelled:
+            cancel.set()
+            raise
+        finally:
+            # Not waited on, cancelled workers stop at their next frame and exit on their own.
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        # Merge the compact results back in frame order.
+        measurements = []
+        for future in futures:
+            measurements.extend(future.result()[1])
+        return measurements
+
+    def stop(self):
+        self.running = False
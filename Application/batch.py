@@ -0,0 +1,116 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from analysispipeline import AnalysisPipeline, find_recording, run_options, OUTPUTS, DEFAULT_PLAN, DEFAULT_OPTIONS
+from measurement import DEFAULT_PARAMS
+from burstdetection import DEFAULT_WINDOWS
+from edgetracker import DEFAULT_TRACKING
+from framestore import DEFAULT_STORE
+from postprocess import DEFAULT_POSTPROCESS, FILTERS
+from datastore import PROCESSED_FORMATS
+import argparse, json, multiprocessing, os, time, traceback, utils
+
+def find_recordings(root):
+    # Every folder under root holding a CSV/MP4 pair, skipping our own output folders.
+    recordings = []
+    for folder, dirs, _ in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in ("processed", ".cache"))
+        csv_path, video_path = find_recording(folder)
+        if csv_path and video_path:
+            recordings.append((folder, csv_path, video_path))
+    return recordings
+
+def analyse(folder, csv_path, video_path, force=False, options=DEFAULT_OPTIONS):
+    result = {"folder": folder, "csv": csv_path, "video": video_path}
+    started = time.perf_counter()
+    try:
+        pipeline = AnalysisPipeline(csv_path, video_path, options=options)
+        if not force and pipeline.is_up_to_date():
+            result["status"] = "skipped"
+        else:
+            pipeline.run()
+            result["status"] = "done"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+def run_batch(root, jobs=1, force=False, summary_path=None, options=DEFAULT_OPTIONS):
+    options = run_options(options)
+    recordings = find_recordings(root)
+    utils.log("Batch", f"Found {len(recordings)} recordings under {root}")
+
+    started = time.perf_counter()
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max(1, jobs), mp_context=context) as pool:
+        futures = [pool.submit(analyse, folder, csv_path, video_path, force=force, options=options) for folder, csv_path, video_path in recordings]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            utils.log("Batch", f"[{len(results)}/{len(recordings)}] {result['status']} {result['folder']} ({result['seconds']}s)")
+
+    results.sort(key=lambda r: r["folder"])
+    summary = {
+        "root": os.path.abspath(root),
+        "finished": utils.timestamp(),
+        "jobs": jobs,
+        "options": dict(options, plan=dict(options["plan"], outputs=list(options["plan"]["outputs"]))),
+        "seconds": round(time.perf_counter() - started, 3),
+        "counts": {status: sum(r["status"] == status for r in results) for status in ("done", "skipped", "failed")},
+        "results": results
+    }
+
+    if summary_path is None:
+        summary_path = os.path.join(root, f"batch_summary_{utils.timestamp()}.json")
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+
+    utils.log("Batch", f"Summary: {summary['counts']} written to {summary_path}")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse every recording folder under a directory without the GUI.")
+    parser.add_argument("root", nargs="?", default="data", help="directory tree containing recording folders")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="recordings analysed concurrently")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="measurement processes per recording")
+    parser.add_argument("-f", "--force", action="store_true", help="re-analyse folders whose outputs are up to date")
+    parser.add_argument("-n", "--scanlines", type=int, default=DEFAULT_PARAMS["scanlines"], help="scanlines measured per frame")
+    parser.add_argument("--format", choices=PROCESSED_FORMATS, default="csv", help="processed data format")
+    parser.add_argument("-o", "--outputs", nargs="+", choices=OUTPUTS, default=list(OUTPUTS), help="outputs to generate, e.g. '-o csv' for data only")
+    parser.add_argument("--scale", type=float, default=DEFAULT_PLAN["scale"], help="size of the output videos relative to the recording")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_PLAN["dpi"], help="resolution of the plots")
+    parser.add_argument("--graph-every", type=int, default=1, help="frames between updates of the combined video's graph")
+    parser.add_argument("--windowed", action="store_true", help="measure in detail only around the burst and other events, sparsely elsewhere")
+    parser.add_argument("--stride", type=int, default=DEFAULT_WINDOWS["stride"], help="frames between samples outside the windows")
+    parser.add_argument("--window", nargs=2, type=float, default=[DEFAULT_WINDOWS["before"], DEFAULT_WINDOWS["after"]], metavar=("BEFORE", "AFTER"), help="seconds measured in detail before and after each event")
+    parser.add_argument("-t", "--track", action="store_true", help="track the edges between frames instead of detecting them independently")
+    parser.add_argument("--store-frames", choices=("gray", "color"), help="keep the decoded frames in a memory-mapped store for later runs and review")
+    parser.add_argument("--filter", choices=[f for f in FILTERS if f], help="smoothing applied to the diameters")
+    parser.add_argument("--filter-window", type=int, default=DEFAULT_POSTPROCESS["window"], help="frames in the smoothing window, odd")
+    parser.add_argument("--mm-per-px", type=float, help="calibration, adds the diameter in millimetres")
+    parser.add_argument("-s", "--summary", help="path of the JSON summary (default: <root>/batch_summary_<timestamp>.json)")
+    args = parser.parse_args()
+
+    params = dict(DEFAULT_PARAMS, scanlines=args.scanlines)
+    plan = {"outputs": tuple(args.outputs), "scale": args.scale, "dpi": args.dpi}
+    windowed = dict(DEFAULT_WINDOWS, stride=max(1, args.stride), before=args.window[0], after=args.window[1]) if args.windowed else None
+    tracking = dict(DEFAULT_TRACKING) if args.track else None
+    postprocessing = dict(DEFAULT_POSTPROCESS, filter=args.filter, window=args.filter_window, mm_per_px=args.mm_per_px)
+    frame_store = dict(DEFAULT_STORE, color=args.store_frames == "color") if args.store_frames else None
+    options = {
+        "graph_every": max(1, args.graph_every),
+        "workers": args.workers,
+        "params": params,
+        "output_format": args.format,
+        "plan": plan,
+        "windowed": windowed,
+        "tracking": tracking,
+        "frame_store": frame_store,
+        "postprocessing": postprocessing
+    }
+    summary = run_batch(args.root, jobs=args.jobs, force=args.force, summary_path=args.summary, options=options)
+    return 1 if summary["counts"]["failed"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,179 @@
+from analysispipeline import AnalysisPipeline
+from graphrenderer import GraphRenderer
+from measurement import DEFAULT_PARAMS, measure_frame, draw_measurement, roi_bounds
+from serialhandler import MockSerialHandler
+from synthetic import generate_recording, SyntheticCamera
+import numpy as np
+import argparse, cv2, json, os, platform, sys, tempfile, time, utils, videoio
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def peak_rss_mb():
+    # Peak resident set size of this process so far, ru_maxrss is in bytes on macOS and KiB elsewhere.
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+    # Windows has no resource module, psutil reports the peak working set there.
+    if psutil is not None:
+        peak = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        return round(peak / 2**20, 1) if peak is not None else None
+    return None
+
+def timed(name, frames, func):
+    started = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - started
+    result = {
+        "stage": name,
+        "frames": frames,
+        "seconds": round(seconds, 4),
+        "fps": round(frames / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb()
+    }
+    utils.log("Benchmark", f"{name}: {result['fps']} fps ({result['seconds']}s)")
+    return result
+
+def decode_frames(video_path):
+    vid = videoio.open_capture(video_path)
+    frames = []
+    while True:
+        ret, frame = vid.read()
+        if not ret:
+            break
+        frames.append(frame)
+    vid.release()
+    return frames
+
+def filter_frames(frames, params):
+    _, _, (y0, y1, x0, x1) = roi_bounds(frames[0].shape, params)
+    for frame in frames:
+        gray = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+        cv2.Canny(cv2.GaussianBlur(gray, (params["blur"], params["blur"]), 0), *params["canny"])
+
+def bench_analysis(folder, frames, size, params):
+    csv_path, video_path = generate_recording(folder, frames=frames, size=size)
+    results = []
+
+    # Decoded frames are kept for the per-stage runs, so the length is capped by --frames.
+    decoded = []
+    results.append(timed("decode", frames, lambda: decoded.extend(decode_frames(video_path))))
+    results.append(timed("filter", len(decoded), lambda: filter_frames(decoded, params)))
+
+    measured = []
+    results.append(timed("measure", len(decoded), lambda: measured.extend(measure_frame(f, params) for f in decoded)))
+    results.append(timed("annotate", len(decoded), lambda: [draw_measurement(f.copy(), d, p, params) for f, (d, p) in zip(decoded, measured)]))
+
+    graph = GraphRenderer(size=(640, size[1]), ylim=(0.0, 220.0))
+    strain = np.linspace(0.0, 0.25, len(decoded))
+    stress = np.linspace(0.0, 200.0, len(decoded))
+    results.append(timed("plot", len(decoded), lambda: [graph.add(x, y) for x, y in zip(strain, stress)]))
+
+    def encode(use):
+        out, path = videoio.open_writer(os.path.join(folder, f"encode_{use}"), 10, size, use)
+        for frame in decoded:
+            out.write(frame)
+        out.release()
+        utils.log("Benchmark", f"{use} video: {os.path.getsize(path) / 2**20:.1f} MiB")
+    results.append(timed("encode_recording", len(decoded), lambda: encode("recording")))
+    results.append(timed("encode_output", len(decoded), lambda: encode("output")))
+
+    decoded.clear()
+    pipeline = AnalysisPipeline(csv_path, video_path, options={"params": params})
+    results.append(timed("pipeline", frames, pipeline.run))
+    return results
+
+def bench_recording(folder, seconds, size, fps):
+    from serviceworker import ServiceWorker
+
+    # The recording loop writes under ./data, so it runs inside the scratch folder.
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        pressure = MockSerialHandler(name="Benchmark", rate=1000)
+        pressure.connect()
+        camera = SyntheticCamera(size=size, fps=fps, realtime=fps > 0)
+        worker = ServiceWorker(pressure_handler=pressure, prefix="Benchmark", fps=fps or 30, camera=camera)
+
+        started = time.perf_counter()
+        worker.start()
+        time.sleep(seconds)
+        worker.stop()
+        worker.wait()
+        elapsed = time.perf_counter() - started
+
+        data_dir = sorted(os.listdir("data"))[-1]
+        with open(os.path.join("data", data_dir, "Benchmark_DATA.csv")) as f:
+            rows = sum(1 for _ in f) - 1
+        with open(os.path.join("data", data_dir, "Benchmark_PRESSURE.csv")) as f:
+            samples = sum(1 for _ in f) - 1
+    finally:
+        os.chdir(cwd)
+
+    result = {
+        "stage": "recording",
+        "seconds": round(elapsed, 3),
+        "camera_fps": fps or "unpaced",
+        "frames": rows,
+        "fps": round(rows / elapsed, 1),
+        "pressure_samples": samples,
+        "pressure_hz": round(samples / elapsed, 1),
+        "dropped_frames": worker.buffer.dropped,
+        "peak_rss_mb": peak_rss_mb()
+    }
+    utils.log("Benchmark", f"recording: {result['fps']} fps, {result['pressure_hz']} Hz pressure")
+    return result
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis and recording pipelines on synthetic recordings.")
+    parser.add_argument("-r", "--resolutions", nargs="+", default=["640x480", "1280x720", "1920x1080"], help="WIDTHxHEIGHT sizes to test")
+    parser.add_argument("-n", "--frames", type=int, default=200, help="frames per synthetic video")
+    parser.add_argument("--scanlines", type=int, default=DEFAULT_PARAMS["scanlines"], help="scanlines measured per frame")
+    parser.add_argument("--record-seconds", type=float, default=5.0, help="length of the recording benchmark, 0 to skip")
+    parser.add_argument("--camera-fps", type=float, default=0, help="synthetic camera rate for the recording benchmark, 0 for unpaced")
+    parser.add_argument("-o", "--output", default="benchmarks", help="folder the JSON results are written to")
+    args = parser.parse_args()
+
+    params = dict(DEFAULT_PARAMS, scanlines=args.scanlines)
+    report = {
+        "timestamp": utils.timestamp(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+        "params": params,
+        "analysis": {},
+        "recording": {}
+    }
+
+    with tempfile.TemporaryDirectory() as scratch:
+        for text in args.resolutions:
+            size = parse_size(text)
+            utils.log("Benchmark", f"Analysis at {text}, {args.frames} frames")
+            report["analysis"][text] = bench_analysis(os.path.join(scratch, text), args.frames, size, params)
+
+            if args.record_seconds > 0:
+                folder = os.path.join(scratch, f"record_{text}")
+                os.makedirs(folder)
+                report["recording"][text] = bench_recording(folder, args.record_seconds, size, args.camera_fps)
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"benchmark_{report['timestamp']}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    utils.log("Benchmark", f"Results written to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import numpy as np
+
+# Two-pass analysis: cheap passes over the pressure series and a sparse diameter sample find the
+# events, then only the frames around them are measured in full detail.
+DEFAULT_WINDOWS = {
+    "stride": 10,
+    "before": 2.0,
+    "after": 1.0,
+    "scanlines": 15,
+    "subpixel": True
+}
+
+def find_burst(pressure, min_drop=0.3):
+    # The sharpest fall in pressure, if it loses at least min_drop of the peak.
+    pressure = np.nan_to_num(np.asarray(pressure, dtype=float))
+    if len(pressure) < 2:
+        return None
+
+    drops = pressure[:-1] - pressure[1:]
+    index = int(np.argmax(drops))
+    peak = pressure.max()
+    if peak <= 0 or drops[index] < min_drop * peak:
+        return None
+    return index + 1
+
+def find_jumps(frames, diameters, threshold=6.0):
+    # Sampled frames where the diameter changes far more than usual, or the edges are lost or found.
+    diameters = np.array([np.nan if d is None else d for d in diameters], dtype=float)
+    if len(diameters) < 2:
+        return []
+
+    missing = np.isnan(diameters)
+    steps = np.abs(np.diff(diameters))
+    usual = np.nanmedian(steps) if (~np.isnan(steps)).any() else 0.0
+    scale = max(usual * threshold, 0.02 * np.nanmedian(diameters)) if (~missing).any() else 0.0
+
+    jumps = np.flatnonzero((steps > scale) | (missing[1:] != missing[:-1]))
+    return [int(frames[i + 1]) for i in jumps]
+
+def detail_windows(events, fps, total_frames, windows=DEFAULT_WINDOWS):
+    # Merged [start, stop) frame ranges around each event.
+    before = int(round(windows["before"] * fps))
+    after = int(round(windows["after"] * fps))
+
+    ranges = []
+    for event in sorted(events):
+        start, stop = max(event - before, 0), min(event + after + 1, total_frames)
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], stop))
+        elif start < stop:
+            ranges.append((start, stop))
+    return ranges
+
+def fill_gaps(total_frames, measured):
+    # Full per-frame series from the sampled frames, diameters linearly interpolated in between.
+    frames = np.array(sorted(i for i, (d, _) in measured.items() if d is not None))
+    if len(frames) == 0:
+        return [(None, [])] * total_frames
+
+    diameters = np.interp(np.arange(total_frames), frames, [measured[i][0] for i in frames])
+    return [measured[i] if i in measured else (float(diameters[i]), []) for i in range(total_frames)]
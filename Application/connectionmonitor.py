@@ -0,0 +1,115 @@
+from PySide6.QtCore import QThread, Signal
+import threading, time, utils, instrumentation
+
+class ConnectionMonitor(QThread):
+    # Supervises the relay and pressure ports off the GUI thread.
+    # While idle the monitor owns the pressure port and drains it to keep liveness current. While recording
+    # the ServiceWorker owns it, and the monitor only looks at when data last arrived.
+    relayUpdated = Signal(bool)
+    pressureUpdated = Signal(bool)
+    connected = Signal(bool)
+
+    def __init__(self, relay, pressure, interval=0.5, min_backoff=0.5, max_backoff=8.0):
+        super().__init__()
+        self.interval = interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.acquiring = False
+        self.set_devices(relay, pressure)
+
+    def set_devices(self, relay, pressure):
+        # Replaced devices are closed by the monitor thread, so the caller never waits on a port.
+        with self.lock:
+            self.retired = [d for d in (getattr(self, "relay", None), getattr(self, "pressure", None)) if d not in (None, relay, pressure)]
+            self.relay = relay
+            self.pressure = pressure
+            self.attempts = {}
+            self.state = (None, None)
+        self.wake.set()
+
+    def set_acquiring(self, acquiring):
+        # Hands the pressure port to the recording and back.
+        with self.lock:
+            self.acquiring = acquiring
+
+    def start(self):
+        self.running = True
+        super().start()
+
+    def run(self):
+        while self.running:
+            # The attempts are taken with the devices, set_devices may replace both while a check is blocked on a port.
+            with self.lock:
+                relay, pressure, acquiring, attempts = self.relay, self.pressure, self.acquiring, self.attempts
+                retired, self.retired = self.retired, []
+            # One failed check mustn't end the thread, the next cycle tries again.
+            try:
+                for device in retired:
+                    device.disconnect()
+
+                with instrumentation.span("monitor.check"):
+                    r = self.supervise(attempts, relay, lambda attempt: relay.probe())
+                    p = self.supervise(attempts, pressure, lambda attempt: self.pressure_alive(pressure, acquiring, attempt))
+
+                if (r, p) != self.state:
+                    self.state = (r, p)
+                    self.relayUpdated.emit(r)
+                    self.pressureUpdated.emit(p)
+                    self.connected.emit(r and p)
+            except Exception as e:
+                utils.log("Connection Monitor", f"Connection check failed: {type(e).__name__}: {e}")
+
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+        with self.lock:
+            devices = self.retired + [self.relay, self.pressure]
+            self.retired = []
+        for device in devices:
+            device.disconnect()
+        self.state = (None, None)
+
+    def supervise(self, attempts, device, healthy):
+        # Reconnects with exponential backoff, so a missing device isn't reopened every cycle.
+        attempt = attempts.setdefault(id(device), {"retry_at": 0.0, "delay": self.min_backoff, "opened_at": None})
+        if device.is_open:
+            if attempt["opened_at"] is None:
+                attempt["opened_at"] = time.perf_counter()
+            if healthy(attempt):
+                return True
+            utils.log("Connection Monitor", f"{type(device).__name__} stopped responding, reconnecting")
+            device.drop()
+
+        now = time.perf_counter()
+        if now < attempt["retry_at"]:
+            return False
+
+        with instrumentation.span("monitor.connect"):
+            device.connect()
+        if device.is_open:
+            attempt.update(retry_at=0.0, delay=self.min_backoff, opened_at=time.perf_counter())
+            return True
+
+        attempt.update(retry_at=now + attempt["delay"], delay=min(attempt["delay"] * 2, self.max_backoff))
+        instrumentation.count("monitor.reconnect_failures")
+        return False
+
+    def pressure_alive(self, pressure, acquiring, attempt):
+        # Replays report liveness from their own schedule, reading would start their clock and use them up.
+        if getattr(pressure, "simulated", False):
+            return pressure.is_alive
+        # Passive: nothing is written to the transducer, data arriving is the only health signal.
+        if not acquiring:
+            pressure.read_batch()
+        if pressure.last_rx is None:
+            # Nothing has arrived since opening, allow it the stale timeout before giving up.
+            opened_at = attempt["opened_at"] or time.perf_counter()
+            return time.perf_counter() - opened_at < getattr(pressure, "stale_after", 2.0)
+        return pressure.is_alive
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
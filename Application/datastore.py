@@ -0,0 +1,147 @@
+import numpy as np
+import argparse, csv, json, os, struct, utils
+
+# Binary columnar storage next to the plain CSVs.
+#   .bcf  append-friendly chunked float64 file used while recording
+#   .parquet / .feather / .npz  processed outputs
+# Every format loads back through load_table() as the same DataFrame a CSV would give.
+# pandas is only imported by the readers, so recording doesn't pay for it.
+
+MAGIC = b"BCF1"
+CHUNKED_EXT = ".bcf"
+PROCESSED_FORMATS = ("csv", "parquet", "feather", "npz")
+
+def has_pyarrow():
+    try:
+        import pyarrow
+        return True
+    except ImportError:
+        return False
+
+class CsvTableWriter:
+    def __init__(self, path, columns, formats=None):
+        self.path = path
+        self.formats = formats or ["{}"] * len(columns)
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def writerow(self, values):
+        self.writer.writerow([fmt.format(v) for fmt, v in zip(self.formats, values)])
+
+    def close(self):
+        self.file.close()
+
+class ChunkedWriter:
+    # Header, then chunks of [uint32 rows][rows x columns float64, column-major], so appends never rewrite.
+    def __init__(self, path, columns, chunk_rows=256):
+        self.path = path
+        self.columns = list(columns)
+        self.chunk_rows = chunk_rows
+        self.rows = []
+        self.file = open(path, "wb")
+        header = json.dumps({"columns": self.columns, "dtype": "<f8"}).encode()
+        self.file.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+    def writerow(self, values):
+        self.rows.append(values)
+        if len(self.rows) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        block = np.asarray(self.rows, dtype="<f8").T
+        self.file.write(struct.pack("<I", block.shape[1]) + block.tobytes())
+        self.file.flush()
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+def open_writer(path, columns, storage="csv", formats=None):
+    # path is given without extension, the storage picks it.
+    if storage == "binary":
+        return ChunkedWriter(path + CHUNKED_EXT, columns)
+    return CsvTableWriter(path + ".csv", columns, formats)
+
+def read_chunked(path):
+    import pandas as pd
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{path} is not a chunked data file")
+
+    size = struct.unpack_from("<I", data, 4)[0]
+    header = json.loads(data[8:8 + size])
+    columns = header["columns"]
+    offset = 8 + size
+
+    blocks = []
+    while offset + 4 <= len(data):
+        rows = struct.unpack_from("<I", data, offset)[0]
+        length = rows * len(columns) * 8
+        # A recording cut off mid-write leaves a partial last chunk, which is ignored.
+        if offset + 4 + length > len(data):
+            utils.log("Data Store", f"Ignoring truncated chunk at the end of {path}")
+            break
+        blocks.append(np.frombuffer(data, dtype="<f8", count=rows * len(columns), offset=offset + 4).reshape(len(columns), rows))
+        offset += 4 + length
+
+    values = np.concatenate(blocks, axis=1) if blocks else np.empty((len(columns), 0))
+    return pd.DataFrame({name: values[i] for i, name in enumerate(columns)})
+
+def load_table(path):
+    import pandas as pd
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return pd.read_csv(path)
+    if ext == CHUNKED_EXT:
+        return read_chunked(path)
+    if ext == ".parquet":
+        return pd.read_parquet(path)
+    if ext == ".feather":
+        return pd.read_feather(path)
+    if ext == ".npz":
+        with np.load(path, allow_pickle=False) as data:
+            columns = [str(c) for c in data["columns"]]
+            return pd.DataFrame({name: data[f"c{i}"] for i, name in enumerate(columns)})
+    raise ValueError(f"Unsupported data file: {path}")
+
+def table_format(output_format):
+    # Parquet and Feather need pyarrow, NPZ is always available.
+    if output_format in ("parquet", "feather") and not has_pyarrow():
+        utils.log("Data Store", f"pyarrow is not installed, writing npz instead of {output_format}")
+        return "npz"
+    return output_format
+
+def save_table(df, path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        df.to_csv(path, index=False)
+    elif ext == ".parquet":
+        df.to_parquet(path, index=False)
+    elif ext == ".feather":
+        df.reset_index(drop=True).to_feather(path)
+    elif ext == ".npz":
+        arrays = {f"c{i}": df[name].to_numpy() for i, name in enumerate(df.columns)}
+        np.savez(path, columns=np.array(df.columns, dtype=str), **arrays)
+    else:
+        raise ValueError(f"Unsupported data file: {path}")
+    return path
+
+def export_csv(path, output=None):
+    output = output or os.path.splitext(path)[0] + ".csv"
+    load_table(path).to_csv(output, index=False)
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description="Export binary recording or processed files to CSV.")
+    parser.add_argument("files", nargs="+", help=".bcf, .parquet, .feather or .npz files")
+    args = parser.parse_args()
+    for path in args.files:
+        utils.log("Data Store", f"Exported {export_csv(path)}")
+
+if __name__ == "__main__":
+    main()
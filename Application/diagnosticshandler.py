@@ -0,0 +1,42 @@
+from PySide6.QtCore import QObject, QTimer, Property, Signal, Slot
+import json, os, instrumentation, utils
+
+class DiagnosticsHandler(QObject):
+    summaryChanged = Signal()
+    snapshotUpdated = Signal(str)
+
+    def __init__(self, interval=1000):
+        super().__init__()
+        self._summary = ""
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(interval)
+
+    @Property(str, notify=summaryChanged)
+    def summary(self):
+        return self._summary
+
+    def refresh(self):
+        summary = instrumentation.summary_text()
+        if summary != self._summary:
+            self._summary = summary
+            self.summaryChanged.emit()
+            self.snapshotUpdated.emit(json.dumps(instrumentation.snapshot()))
+
+    @Slot()
+    def reset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    @Slot(result=str)
+    def dump_trace(self):
+        if not instrumentation.trace_path:
+            instrumentation.enable_trace(os.path.join("data", f"trace_{utils.timestamp()}.json"))
+            utils.log("Diagnostics Handler", f"Tracing enabled, dump again to write {instrumentation.trace_path}")
+            return ""
+
+        os.makedirs(os.path.dirname(instrumentation.trace_path) or ".", exist_ok=True)
+        path = instrumentation.dump_trace()
+        utils.log("Diagnostics Handler", f"Trace written to {path}")
+        return path
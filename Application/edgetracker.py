@@ -0,0 +1,96 @@
+import numpy as np
+import cv2
+from measurement import DEFAULT_PARAMS, roi_bounds, measure_frame, combine_diameters
+
+# Follows the top and bottom edge of every scanline from frame to frame with an alpha-beta filter.
+# Only narrow strips around the predicted edges are filtered, the full band is searched again as soon as
+# they miss, and the track only coasts on its prediction when that finds nothing either.
+DEFAULT_TRACKING = {
+    "window": 12,
+    "alpha": 0.5,
+    "beta": 0.1,
+    "max_misses": 5
+}
+
+class EdgeTracker:
+    def __init__(self, params=DEFAULT_PARAMS, tracking=DEFAULT_TRACKING):
+        self.params = params
+        self.window = tracking["window"]
+        self.alpha = tracking["alpha"]
+        self.beta = tracking["beta"]
+        self.max_misses = tracking["max_misses"]
+        self.reset()
+
+    def reset(self):
+        # Rows 0/1 are the top/bottom edges, one column per scanline.
+        self.cols = None
+        self.position = None
+        self.velocity = None
+        self.misses = 0
+
+    def measure(self, frame):
+        if self.position is None:
+            return self.acquire(frame)
+
+        predicted = self.position + self.velocity
+        found = np.vstack([self.search(frame, predicted[0]), self.search(frame, predicted[1])])
+
+        valid = ~np.isnan(found).any(axis=0)
+        if valid.sum() * 2 < len(self.cols):
+            # A sudden change such as the burst leaves the strips, so the full band is searched right away.
+            diameter, points = self.acquire(frame)
+            if diameter is not None:
+                return diameter, points
+
+            # Coast on the prediction through a few unreadable frames rather than dropping to zero.
+            self.misses += 1
+            if self.misses > self.max_misses:
+                self.reset()
+                return None, []
+            self.position = predicted
+            return self.result(np.ones(len(self.cols), dtype=bool))
+
+        self.misses = 0
+        residual = np.where(valid, found - predicted, 0.0)
+        self.position = predicted + self.alpha * residual
+        self.velocity = self.velocity + self.beta * residual
+        return self.result(valid)
+
+    def acquire(self, frame):
+        # Full-band detection, which also seeds the track.
+        diameter, points = measure_frame(frame, self.params)
+        if diameter is None:
+            return None, []
+
+        cols, top, bottom = (np.array(values) for values in zip(*points))
+        self.cols = cols
+        self.position = np.vstack([top, bottom]).astype(float)
+        self.velocity = np.zeros_like(self.position)
+        self.misses = 0
+        return diameter, points
+
+    def search(self, frame, predicted):
+        # Edge nearest the prediction in a strip of +/- window rows, NaN where a scanline has none.
+        (top_limit, bottom_limit), _, _ = roi_bounds(frame.shape, self.params)
+        pad = self.params["blur"] // 2 + 2
+        lo = max(int(np.floor(predicted.min())) - self.window, top_limit)
+        hi = min(int(np.ceil(predicted.max())) + self.window + 1, bottom_limit)
+        if hi - lo < 2:
+            return np.full(len(self.cols), np.nan)
+
+        y0, y1 = max(lo - pad, 0), min(hi + pad, frame.shape[0])
+        x0, x1 = max(int(self.cols.min()) - pad, 0), min(int(self.cols.max()) + pad + 1, frame.shape[1])
+        strip = frame[y0:y1, x0:x1]
+        gray = cv2.cvtColor(strip, cv2.COLOR_BGR2GRAY) if strip.ndim == 3 else strip
+        blurred = cv2.GaussianBlur(gray, (self.params["blur"], self.params["blur"]), 0)
+        edges = cv2.Canny(blurred, *self.params["canny"])[lo - y0:hi - y0, self.cols - x0] > 0
+
+        rows = np.arange(lo, hi)[:, None]
+        distance = np.where(edges & (np.abs(rows - predicted) <= self.window), np.abs(rows - predicted), np.inf)
+        nearest = distance.argmin(axis=0)
+        return np.where(np.isfinite(distance.min(axis=0)), nearest + lo, np.nan)
+
+    def result(self, valid):
+        top, bottom = self.position[0][valid], self.position[1][valid]
+        points = [(int(c), int(round(t)), int(round(b))) for c, t, b in zip(self.cols[valid], top, bottom)]
+        return combine_diameters(bottom - top), points
@@ -0,0 +1,60 @@
+from collections import deque
+import threading
+
+# What to do when the buffer is full.
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+DROP_OVERLAYS = "drop_overlays"
+POLICIES = (BLOCK, DROP_OLDEST, DROP_OVERLAYS)
+
+class FrameBuffer:
+    def __init__(self, capacity=64, policy=BLOCK):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown buffer policy: {policy}")
+        self.capacity = max(1, capacity)
+        self.policy = policy
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+        self.high_water = 0
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= self.capacity:
+                if self.policy == DROP_OLDEST:
+                    self.items.popleft()
+                    self.dropped += 1
+                else:
+                    # Block (and drop overlays) wait for the writer to catch up.
+                    while len(self.items) >= self.capacity and not self.closed:
+                        self.condition.wait()
+
+            self.items.append(item)
+            self.high_water = max(self.high_water, len(self.items))
+            self.condition.notify_all()
+
+    def get(self):
+        # Returns None once the buffer is closed and drained.
+        with self.condition:
+            while not self.items and not self.closed:
+                self.condition.wait()
+            if not self.items:
+                return None
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    @property
+    def depth(self):
+        return len(self.items)
+
+    @property
+    def behind(self):
+        # Under drop_overlays the writer skips the text overlay once the buffer is half full.
+        return self.policy == DROP_OVERLAYS and len(self.items) >= self.capacity // 2
@@ -0,0 +1,167 @@
+import numpy as np
+import argparse, cv2, json, os, utils, measurementcache, videoio
+from measurement import DEFAULT_PARAMS, roi_bounds, measure_crop, cancelled
+
+# Decoded frames kept in a memory-mapped file next to the measurement cache, so later passes, worker
+# processes and frame-by-frame review can read any frame without decoding the video again and without
+# holding it in memory. Frames are cropped to the measurement region, which every scanline count shares,
+# and stored grey unless colour is asked for. A JSON index holds the layout and per-frame timestamps.
+
+DEFAULT_STORE = {"color": False}
+
+# Frames the file grows by once the container's frame count turns out short.
+GROW_FRAMES = 256
+
+def store_paths(processed_dir, video_path):
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    root = os.path.join(processed_dir, measurementcache.CACHE_DIR, f"{stem}_FRAMES")
+    return root + ".u8", root + ".json"
+
+class FrameStore:
+    # Read-only view of a finished store, frame(i) returns a view into the mapping rather than a copy.
+    def __init__(self, path, meta_path):
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.meta_path = meta_path
+        self.origin = tuple(self.meta["origin"])
+        self.frame_shape = tuple(self.meta["frame_shape"])
+        self.times = np.asarray(self.meta["times"], dtype=float)
+        shape = (self.meta["count"], *self.meta["shape"])
+        self.frames = np.memmap(path, dtype=np.uint8, mode="r", shape=shape) if self.meta["count"] else np.empty(shape, np.uint8)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def frame(self, index):
+        return self.frames[index]
+
+    def index_at(self, seconds):
+        # Last frame at or before the given video time, for scrubbing.
+        return int(np.clip(np.searchsorted(self.times, seconds, side="right") - 1, 0, max(len(self) - 1, 0)))
+
+    def covers(self, params=DEFAULT_PARAMS):
+        y0, y1, x0, x1 = roi_bounds(self.frame_shape, params)[2]
+        oy, ox = self.origin
+        height, width = self.meta["shape"][:2]
+        return y0 >= oy and x0 >= ox and y1 <= oy + height and x1 <= ox + width
+
+    def measure(self, index, params=DEFAULT_PARAMS):
+        return measure_crop(self.frames[index], self.origin, self.frame_shape, params)
+
+class FrameStoreWriter:
+    # Appends frames as they are decoded, the store only replaces an earlier one once closed.
+    def __init__(self, processed_dir, video_path, frame_shape, capacity, params=DEFAULT_PARAMS, store=DEFAULT_STORE):
+        store = dict(DEFAULT_STORE, **store)
+        self.path, self.meta_path = store_paths(processed_dir, video_path)
+        self.video_path = video_path
+        self.frame_shape = tuple(frame_shape[:2])
+        self.color = store["color"]
+        self.region = roi_bounds(frame_shape, params)[2]
+        y0, y1, x0, x1 = self.region
+        self.shape = (y1 - y0, x1 - x0, 3) if self.color else (y1 - y0, x1 - x0)
+        self.frame_bytes = int(np.prod(self.shape))
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.partial = self.path + ".partial"
+        self.capacity = 0
+        self.frames = None
+        self.grow(max(1, capacity))
+        self.times = []
+
+    def grow(self, capacity):
+        if self.frames is not None:
+            self.frames.flush()
+            self.frames = None
+        with open(self.partial, "ab") as f:
+            f.truncate(capacity * self.frame_bytes)
+        self.frames = np.memmap(self.partial, dtype=np.uint8, mode="r+", shape=(capacity, *self.shape))
+        self.capacity = capacity
+
+    def add(self, frame, seconds):
+        if len(self.times) == self.capacity:
+            self.grow(self.capacity + GROW_FRAMES)
+        y0, y1, x0, x1 = self.region
+        crop = frame[y0:y1, x0:x1]
+        self.frames[len(self.times)] = crop if self.color or crop.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        self.times.append(seconds)
+
+    def close(self):
+        count = len(self.times)
+        self.frames.flush()
+        self.frames = None
+        with open(self.partial, "r+b") as f:
+            f.truncate(count * self.frame_bytes)
+        os.replace(self.partial, self.path)
+
+        meta = {
+            "video": measurementcache.video_signature(self.video_path),
+            "frame_shape": list(self.frame_shape),
+            "origin": [self.region[0], self.region[2]],
+            "shape": list(self.shape),
+            "color": self.color,
+            "count": count,
+            "times": self.times
+        }
+        with open(self.meta_path, "w") as f:
+            json.dump(meta, f)
+        utils.log("Frame Store", f"Stored {count} frames in {self.path}")
+        return FrameStore(self.path, self.meta_path)
+
+    def discard(self):
+        self.frames = None
+        if os.path.exists(self.partial):
+            os.remove(self.partial)
+
+def open_store(processed_dir, video_path, params=DEFAULT_PARAMS):
+    # The store for this video if it is complete, current and holds the measurement region for params.
+    path, meta_path = store_paths(processed_dir, video_path)
+    if not (os.path.exists(path) and os.path.exists(meta_path)):
+        return None
+
+    try:
+        store = FrameStore(path, meta_path)
+    except Exception as e:
+        utils.log("Frame Store", f"Failed to read {meta_path}: {e}")
+        return None
+    if store.meta["video"] != measurementcache.video_signature(video_path):
+        utils.log("Frame Store", f"Video changed, ignoring {os.path.basename(path)}")
+        return None
+    if not store.covers(params):
+        utils.log("Frame Store", "Stored frames don't cover the measurement region")
+        return None
+    return store
+
+def measure_stored_range(path, meta_path, start, stop, params=DEFAULT_PARAMS):
+    # Worker process counterpart of measure_range, reading the mapped frames instead of decoding.
+    store = FrameStore(path, meta_path)
+    stop = len(store) if stop is None else min(stop, len(store))
+    results = []
+    for index in range(start, stop):
+        if cancelled():
+            break
+        results.append(store.measure(index, params))
+    return start, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the frame store of an analysed recording.")
+    parser.add_argument("video", help="recording video, the store is looked up in its processed folder")
+    parser.add_argument("--frame", type=int, help="frame index to export")
+    parser.add_argument("--time", type=float, help="video time in seconds to export the frame at")
+    parser.add_argument("-o", "--output", default="frame.png", help="image file for the exported frame")
+    args = parser.parse_args()
+
+    processed_dir = os.path.join(os.path.dirname(args.video), "processed")
+    if not videoio.is_video(args.video) or (store := open_store(processed_dir, args.video)) is None:
+        print(f"No current frame store for {args.video}")
+        return 1
+
+    print(json.dumps({key: value for key, value in store.meta.items() if key != "times"}, indent=2))
+    if args.frame is not None or args.time is not None:
+        index = args.frame if args.frame is not None else store.index_at(args.time)
+        cv2.imwrite(args.output, np.asarray(store.frame(index)))
+        print(f"Frame {index} at {store.times[index]:.3f}s written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
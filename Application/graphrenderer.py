@@ -0,0 +1,78 @@
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+import numpy as np
+import cv2
+
+class GraphRenderer:
+    def __init__(self, size=(640, 480), xlim=(0.0, 0.01), ylim=(0.0, 1.0), every=1, headroom=0.25):
+        self.width, self.height = size
+        self.every = max(1, int(every))
+        self.headroom = headroom
+        self.xs = []
+        self.ys = []
+        self.updates = 0
+        self.drawn = 0
+        self.image = None
+
+        # Axes, grid and labels are drawn once and only redrawn when the limits grow.
+        self.figure = Figure(figsize=(self.width / 100, self.height / 100), dpi=100)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.ax.set_xlabel(r"Circumferential Strain, $\epsilon_\theta$")
+        self.ax.set_ylabel(r"Hoop Stress, $\sigma_\theta$ [kPa]")
+        self.ax.grid(True)
+        self.ax.set_xlim(*xlim)
+        self.ax.set_ylim(*ylim)
+        self.figure.tight_layout()
+
+        self.segment = Line2D([], [], color='blue', linewidth=2, animated=True)
+        self.ax.add_line(self.segment)
+        self.redraw()
+
+    def add(self, x, y):
+        self.xs.append(x)
+        self.ys.append(y)
+        self.updates += 1
+
+        if np.isfinite(x) and np.isfinite(y) and self.grow(x, y):
+            self.redraw()
+        elif self.updates % self.every == 0:
+            self.draw_pending()
+        return self.image
+
+    def grow(self, x, y):
+        changed = False
+        for value, get, set_ in ((x, self.ax.get_xlim, self.ax.set_xlim), (y, self.ax.get_ylim, self.ax.set_ylim)):
+            low, high = get()
+            span = high - low
+            if value < low:
+                low = value - span * self.headroom
+                changed = True
+            if value > high:
+                high = value + span * self.headroom
+                changed = True
+            set_(low, high)
+        return changed
+
+    def redraw(self):
+        # Full redraw of the static background, then the whole line once.
+        self.canvas.draw()
+        self.drawn = 0
+        self.draw_pending()
+
+    def draw_pending(self):
+        # Only the segments added since the last draw, starting from the last drawn point.
+        start = max(self.drawn - 1, 0)
+        if len(self.xs) - start >= 2:
+            self.segment.set_data(self.xs[start:], self.ys[start:])
+            self.ax.draw_artist(self.segment)
+        self.drawn = len(self.xs)
+        self.image = self.snapshot()
+
+    def snapshot(self):
+        rgba = np.asarray(self.canvas.buffer_rgba())
+        image = cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGR)
+        if image.shape[1] != self.width or image.shape[0] != self.height:
+            image = cv2.resize(image, (self.width, self.height))
+        return image
@@ -0,0 +1,129 @@
+import atexit, collections, json, os, threading, time
+
+# Named spans and counters, cheap enough to leave on: a span costs two perf_counter_ns calls and a dict lookup.
+
+class Histogram:
+    def __init__(self, size=512):
+        self.size = size
+        self.samples = [0.0] * size
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.samples[self.index] = ms
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def summary(self):
+        # Percentiles over the rolling window, totals over the whole run.
+        recent = sorted(self.samples[:min(self.count, self.size)])
+        if not recent:
+            return {"count": 0}
+
+        def percentile(p):
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(self.max, 3)
+        }
+
+histograms = {}
+counters = {}
+lock = threading.Lock()
+
+# Only the most recent events are traced, so tracing a long recording or batch run stays bounded in memory.
+TRACE_EVENTS = 100_000
+
+trace_path = os.environ.get("BURST_TRACE")
+trace_events = collections.deque(maxlen=TRACE_EVENTS)
+trace_origin = time.perf_counter_ns()
+
+class Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        ended = time.perf_counter_ns()
+        record(self.name, self.started, ended)
+        return False
+
+def span(name):
+    return Span(name)
+
+def record(name, started, ended):
+    ms = (ended - started) / 1e6
+    histogram = histograms.get(name)
+    if histogram is None:
+        with lock:
+            histogram = histograms.setdefault(name, Histogram())
+    histogram.add(ms)
+
+    if trace_path:
+        trace_events.append({
+            "name": name,
+            "ph": "X",
+            "ts": (started - trace_origin) / 1e3,
+            "dur": (ended - started) / 1e3,
+            "pid": os.getpid(),
+            "tid": threading.get_ident()
+        })
+
+def count(name, n=1):
+    counters[name] = counters.get(name, 0) + n
+
+def snapshot():
+    with lock:
+        names = sorted(histograms)
+    return {
+        "spans": {name: histograms[name].summary() for name in names},
+        "counters": dict(sorted(counters.items()))
+    }
+
+def summary_text():
+    lines = []
+    for name, stats in snapshot()["spans"].items():
+        if stats["count"]:
+            lines.append(f"{name}: p50 {stats['p50_ms']:.2f}ms p95 {stats['p95_ms']:.2f}ms n={stats['count']}")
+    for name, value in snapshot()["counters"].items():
+        lines.append(f"{name}: {value}")
+    return "\n".join(lines)
+
+def reset():
+    with lock:
+        histograms.clear()
+        counters.clear()
+        trace_events.clear()
+
+def enable_trace(path):
+    global trace_path
+    trace_path = path
+
+def dump_trace(path=None):
+    # Chrome trace event format, loadable in chrome://tracing or Perfetto.
+    path = path or trace_path
+    if not path:
+        return None
+    with open(path, "w") as f:
+        json.dump({"traceEvents": list(trace_events), "displayTimeUnit": "ms"}, f)
+    return path
+
+@atexit.register
+def _dump_at_exit():
+    if trace_path and trace_events:
+        dump_trace()
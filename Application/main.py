@@ -1,8 +1,14 @@
+import time
+STARTED = time.perf_counter_ns()
+
 import sys, os
 from PySide6.QtWidgets import QApplication
 from PySide6.QtQml import QQmlApplicationEngine
 from servicehandler import ServiceHandler
 from analysishandler import AnalysisHandler
+from diagnosticshandler import DiagnosticsHandler
+import utils, instrumentation
+IMPORTED = time.perf_counter_ns()
 
 def main():
     os.environ["QT_QUICK_CONTROLS_STYLE"] = "Material"
@@ -13,14 +19,31 @@ def main():
 
     services = ServiceHandler()
     engine.rootContext().setContextProperty("Services", services)
-    app.aboutToQuit.connect(services.disconnect)
+    app.aboutToQuit.connect(services.shutdown)
 
     analysis = AnalysisHandler()
     engine.rootContext().setContextProperty("Analysis", analysis)
 
+    diagnostics = DiagnosticsHandler()
+    engine.rootContext().setContextProperty("Diagnostics", diagnostics)
+
+    instrumentation.record("startup.imports", STARTED, IMPORTED)
+    loading = time.perf_counter_ns()
     engine.load("main.qml")
     if not engine.rootObjects():
         sys.exit(-1)
+    loaded = time.perf_counter_ns()
+    instrumentation.record("startup.qml_load", loading, loaded)
+
+    # Time to the first rendered frame, after which the analysis modules are loaded in the background.
+    window = engine.rootObjects()[0]
+    def first_frame():
+        window.frameSwapped.disconnect(first_frame)
+        shown = time.perf_counter_ns()
+        instrumentation.record("startup.first_window", STARTED, shown)
+        utils.log("Startup", f"Window shown after {(shown - STARTED) / 1e6:.0f}ms (imports {(IMPORTED - STARTED) / 1e6:.0f}ms, QML {(loaded - loading) / 1e6:.0f}ms)")
+        analysis.warm_up()
+    window.frameSwapped.connect(first_frame)
 
     sys.exit(app.exec())
 
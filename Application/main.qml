@@ -38,6 +38,35 @@ Window {
         opacity: 0.6
     }
 
+    // F12 toggles the per-stage timing panel, F11 enables tracing and then dumps the trace file.
+    Shortcut {
+        sequence: "F12"
+        onActivated: diagnosticsPanel.visible = !diagnosticsPanel.visible
+    }
+
+    Shortcut {
+        sequence: "F11"
+        onActivated: Diagnostics.dump_trace()
+    }
+
+    Label {
+        id: diagnosticsPanel
+        visible: false
+        text: Diagnostics.summary
+        color: Theme.altTextColor
+        opacity: 0.8
+        anchors {
+            top: parent.top
+            topMargin: 8
+            left: parent.left
+            leftMargin: 8
+        }
+        font {
+            family: Theme.fontFamily
+            pointSize: 8
+        }
+    }
+
     Connections {
         target: stackView.currentItem
         function onGoToMainScreen() {
@@ -0,0 +1,166 @@
+import numpy as np
+import cv2, videoio
+
+# Everything that changes the measured diameters, also used as the cache key.
+DEFAULT_PARAMS = {
+    "blur": 5,
+    "canny": (0, 85),
+    "letterbox": (0.15, 0.85),
+    "span": (0.10, 0.90),
+    "scanlines": 3,
+    "subpixel": False
+}
+
+# Per-column labels are only drawn when there are few enough scanlines to read them.
+MAX_LABELLED_SCANLINES = 8
+
+def scanline_columns(width, params=DEFAULT_PARAMS):
+    # Evenly spaced columns across the span, 3 scanlines gives the original 10%/50%/90%.
+    fractions = np.linspace(params["span"][0], params["span"][1], params["scanlines"])
+    return np.clip((fractions * width).astype(int), 0, width - 1)
+
+def roi_bounds(shape, params=DEFAULT_PARAMS):
+    height, width = shape[:2]
+
+    # Ignore the top and bottom letterbox.
+    top_limit = int(params["letterbox"][0] * height)
+    bottom_limit = int(params["letterbox"][1] * height)
+    cols = scanline_columns(width, params)
+
+    # Pad the crop so the blur sees the same neighbourhood as on the full frame. Canny's hysteresis links
+    # weak edges across the whole image though, so on noisy frames a weak edge that only connects to a
+    # strong one outside the crop is dropped here and kept on the full frame. Clean recordings measure
+    # the same either way, very noisy ones can differ by tens of pixels.
+    pad = params["blur"] // 2 + 2
+    y0, y1 = max(top_limit - pad, 0), min(bottom_limit + pad, height)
+    x0, x1 = max(int(cols.min()) - pad, 0), min(int(cols.max()) + pad + 1, width)
+    return (top_limit, bottom_limit), cols, (y0, y1, x0, x1)
+
+def refine_edges(gray, rows, cols):
+    # Peak of the vertical gradient, fitted with a parabola through the neighbouring rows.
+    ys = np.clip(rows[None, :] + np.arange(-2, 3)[:, None], 0, gray.shape[0] - 1)
+    values = gray[ys, cols[None, :]].astype(np.float32)
+    left, centre, right = np.abs(values[2:] - values[:-2]) / 2
+
+    curvature = left - 2 * centre + right
+    peaked = curvature < 0
+    offset = np.where(peaked, 0.5 * (left - right) / np.where(peaked, curvature, 1), 0.0)
+    return rows + np.clip(offset, -0.5, 0.5)
+
+def combine_diameters(diameters):
+    # Replace values more than X px away from median with median, then average.
+    median = np.median(diameters)
+    capped = np.where(np.abs(diameters - median) < 100, diameters, median)
+    return float(np.mean(capped))
+
+def measure_frame(frame, params=DEFAULT_PARAMS):
+    return measure_crop(frame, (0, 0), frame.shape, params)
+
+def measure_crop(crop, origin, shape, params=DEFAULT_PARAMS):
+    # Measures from any crop of a frame of `shape` whose top-left corner is at `origin`, as long as it
+    # covers the ROI. Points are always in full frame coordinates.
+    (top_limit, bottom_limit), cols, (y0, y1, x0, x1) = roi_bounds(shape, params)
+    oy, ox = origin
+    if y0 < oy or x0 < ox or y1 - oy > crop.shape[0] or x1 - ox > crop.shape[1]:
+        raise ValueError("Crop does not cover the measurement region")
+
+    # Crop to the measurement band before any filtering.
+    roi = crop[y0 - oy:y1 - oy, x0 - ox:x1 - ox]
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+
+    # Light blur for stable edges.
+    blurred = cv2.GaussianBlur(gray, (params["blur"], params["blur"]), 0)
+
+    # Canny settings.
+    edges = cv2.Canny(blurred, *params["canny"])
+
+    # First and last edge of every scanline in one pass.
+    band = edges[top_limit - y0:bottom_limit - y0, cols - x0] > 0
+    valid = band.sum(axis=0) >= 2
+    if not valid.any():
+        return None, []
+
+    first = band.argmax(axis=0) + top_limit
+    last = band.shape[0] - 1 - band[::-1].argmax(axis=0) + top_limit
+    cols, first, last = cols[valid], first[valid], last[valid]
+    points = list(zip(cols.tolist(), first.tolist(), last.tolist()))
+
+    diameters = last - first
+    if params["subpixel"]:
+        diameters = refine_edges(blurred, last - y0, cols - x0) - refine_edges(blurred, first - y0, cols - x0)
+    return combine_diameters(diameters), points
+
+def draw_measurement(frame, diameter, points, params=DEFAULT_PARAMS):
+    height = frame.shape[0]
+    top_limit = int(params["letterbox"][0] * height)
+    bottom_limit = int(params["letterbox"][1] * height)
+
+    labelled = len(points) <= MAX_LABELLED_SCANLINES
+    for col, top_y, bottom_y in points:
+        # Draw scanline.
+        cv2.line(frame, (col, top_limit), (col, bottom_limit), (0, 0, 0), 1)
+
+        # Draw diameter.
+        cv2.circle(frame, (col, top_y), 4, (0, 255, 0), -1)
+        cv2.circle(frame, (col, bottom_y), 4, (0, 255, 0), -1)
+        cv2.line(frame, (col, top_y), (col, bottom_y), (0, 0, 0), 2)
+
+        if labelled:
+            cv2.putText(
+                frame,
+                f"Diameter: {bottom_y - top_y}px",
+                (col + 5, top_y - 10),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.4,
+                (0, 0, 0),
+                2
+            )
+
+    # Draw averaged diameter.
+    cv2.putText(
+        frame,
+        f"Diameter: {diameter:.2f}px" if diameter is not None else "Diameter: N/A",
+        (420, height - 10),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        0.7,
+        (255, 255, 255),
+        2
+    )
+    return frame
+
+# Set in each worker process by the pool initializer, so the parent can stop ranges part-way on cancel.
+cancel_event = None
+
+def init_worker(event):
+    global cancel_event
+    cancel_event = event
+
+def cancelled():
+    return cancel_event is not None and cancel_event.is_set()
+
+def measure_range(video_path, start, stop, params=DEFAULT_PARAMS):
+    # Runs in a worker process, so it opens its own capture and only returns compact results.
+    vid = videoio.seek(videoio.open_capture(video_path), video_path, start)
+
+    results = []
+    index = start
+    while (stop is None or index < stop) and not cancelled():
+        ret, frame = vid.read()
+        if not ret:
+            break
+        results.append(measure_frame(frame, params))
+        index += 1
+
+    vid.release()
+    return start, results
+
+def split_ranges(total_frames, workers, chunks_per_worker=4):
+    chunk = max(1, -(-total_frames // (workers * chunks_per_worker)))
+    ranges = [(start, start + chunk) for start in range(0, total_frames, chunk)]
+
+    # The frame count reported by the container can be short, so the last range reads to the end.
+    if ranges:
+        ranges[-1] = (ranges[-1][0], None)
+    else:
+        ranges = [(0, None)]
+    return ranges
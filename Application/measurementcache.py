@@ -0,0 +1,104 @@
+import numpy as np
+import hashlib, json, os, utils
+
+# Per-recording cache of measured diameters and edge points, stored next to the processed outputs.
+CACHE_DIR = ".cache"
+SAMPLE_BYTES = 1 << 20
+
+def video_signature(video_path):
+    # Size and mtime plus a hash of the head and tail, cheap even for very long recordings.
+    stat = os.stat(video_path)
+    digest = hashlib.sha1()
+    with open(video_path, "rb") as f:
+        digest.update(f.read(SAMPLE_BYTES))
+        if stat.st_size > SAMPLE_BYTES:
+            f.seek(max(SAMPLE_BYTES, stat.st_size - SAMPLE_BYTES))
+            digest.update(f.read(SAMPLE_BYTES))
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha1": digest.hexdigest()}
+
+def params_key(params):
+    text = json.dumps(params, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+def cache_path(processed_dir, video_path, params):
+    # One entry per parameter set, so changing a parameter never evicts the other entries.
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(processed_dir, CACHE_DIR, f"{stem}_{params_key(params)}.npz")
+
+def load(processed_dir, video_path, params):
+    path = cache_path(processed_dir, video_path, params)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["video"] != video_signature(video_path):
+                utils.log("Measurement Cache", f"Video changed, discarding {os.path.basename(path)}")
+                os.remove(path)
+                return None
+
+            diameters = data["diameters"]
+            cols = data["cols"]
+            edges = data["edges"]
+    except Exception as e:
+        utils.log("Measurement Cache", f"Failed to read {path}: {e}")
+        return None
+
+    measurements = []
+    for diameter, frame_cols, frame_edges in zip(diameters, cols, edges):
+        points = [(int(col), int(top_y), int(bottom_y)) for col, (top_y, bottom_y) in zip(frame_cols, frame_edges) if col >= 0]
+        measurements.append((None if np.isnan(diameter) else float(diameter), points))
+    return measurements
+
+def save(processed_dir, video_path, params, measurements):
+    path = cache_path(processed_dir, video_path, params)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Pad the per-frame edge points to a fixed width, -1 marks a column without a detection.
+    width = max([len(points) for _, points in measurements], default=0)
+    diameters = np.full(len(measurements), np.nan)
+    cols = np.full((len(measurements), width), -1, dtype=np.int32)
+    edges = np.full((len(measurements), width, 2), -1, dtype=np.int32)
+    for i, (diameter, points) in enumerate(measurements):
+        if diameter is not None:
+            diameters[i] = diameter
+        for j, (col, top_y, bottom_y) in enumerate(points):
+            cols[i, j] = col
+            edges[i, j] = (top_y, bottom_y)
+
+    meta = json.dumps({"video": video_signature(video_path), "params": params})
+    temp_path = path + ".tmp.npz"
+    np.savez_compressed(temp_path, meta=meta, diameters=diameters, cols=cols, edges=edges)
+    os.replace(temp_path, path)
+    utils.log("Measurement Cache", f"Saved {len(measurements)} measurements to {path}")
+    return path
+
+def manifest_path(processed_dir):
+    return os.path.join(processed_dir, CACHE_DIR, "outputs.json")
+
+def read_manifest(processed_dir):
+    try:
+        with open(manifest_path(processed_dir)) as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def output_key(video_path, params):
+    return f"{video_signature(video_path)['sha1']}_{params_key(params)}"
+
+def mark_outputs(processed_dir, output_paths, video_path, params):
+    # Records which measurement entry each derived output was generated from.
+    manifest = read_manifest(processed_dir)
+    key = output_key(video_path, params)
+    for path in output_paths:
+        manifest[os.path.basename(path)] = key
+
+    os.makedirs(os.path.join(processed_dir, CACHE_DIR), exist_ok=True)
+    with open(manifest_path(processed_dir), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+def outputs_current(processed_dir, output_paths, video_path, params):
+    manifest = read_manifest(processed_dir)
+    key = output_key(video_path, params)
+    return all(os.path.exists(p) and manifest.get(os.path.basename(p)) == key for p in output_paths)
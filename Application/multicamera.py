@@ -0,0 +1,134 @@
+import numpy as np
+import cv2, glob, math, os, re, threading, utils, instrumentation, datastore, measurementcache, videoio
+from framebuffer import FrameBuffer, BLOCK
+from measurement import DEFAULT_PARAMS, measure_range, cancelled
+
+# More than one viewpoint per recording. The first camera is the primary one, recorded and aligned to
+# the pressure in _DATA as before. With more cameras every view k writes _VIDEO_CAMk, and each further
+# camera also writes a _FRAMES_CAMk index with the capture time of every frame on the shared clock.
+
+VIEW_PATTERN = re.compile(r"^(?P<base>.*)_VIDEO(?:_CAM(?P<number>\d+))?$", re.IGNORECASE)
+
+def camera_name(index):
+    return f"CAM{index + 1}"
+
+def camera_number(video_path):
+    # 1 for the primary view, plain _VIDEO files included, so sorting puts it first.
+    match = VIEW_PATTERN.match(os.path.splitext(os.path.basename(video_path))[0])
+    return int(match["number"]) if match and match["number"] else 1
+
+def view_paths(video_path):
+    # [(name, path)] of every view of the recording video_path belongs to, primary first.
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    match = VIEW_PATTERN.match(stem)
+    if not match or match["number"] is None:
+        return [(camera_name(0), video_path)]
+
+    folder = os.path.dirname(video_path)
+    paths = [p for p in glob.glob(os.path.join(folder, glob.escape(match["base"]) + "_VIDEO_CAM*")) if videoio.is_video(p)]
+    views = {}
+    for path in sorted(paths, key=camera_number):
+        views.setdefault(camera_number(path), path)
+    views[camera_number(video_path)] = video_path
+    return [(f"CAM{number}", views[number]) for number in sorted(views)]
+
+def frames_path(video_path):
+    root = os.path.splitext(video_path)[0]
+    match = VIEW_PATTERN.match(os.path.basename(root))
+    if not match or match["number"] is None:
+        return None
+    stem = f"{match['base']}_FRAMES_CAM{match['number']}"
+    for ext in (".csv", datastore.CHUNKED_EXT):
+        path = os.path.join(os.path.dirname(video_path), stem + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+def view_times(video_path, frames, fps):
+    # Capture times from the view's index, or its frame rate when it has none.
+    path = frames_path(video_path)
+    if path:
+        times = datastore.load_table(path)["Elapsed Time [s]"].to_numpy(dtype=float)
+        if len(times) >= frames:
+            return times[:frames]
+        utils.log("Multi Camera", f"{os.path.basename(path)} is short of {frames} frames, using the frame rate")
+    return np.arange(frames) / (fps if fps and fps > 0 else 10.0)
+
+def measure_view(video_path, processed_dir, params=DEFAULT_PARAMS):
+    # Runs in a worker process per view, through the same measurement cache as the primary view.
+    # Returns (fps, measurements).
+    vid = videoio.open_capture(video_path)
+    fps = vid.get(cv2.CAP_PROP_FPS)
+    vid.release()
+
+    measurements = measurementcache.load(processed_dir, video_path, params)
+    if measurements is None:
+        measurements = measure_range(video_path, 0, None, params)[1]
+        # A cancelled view only got part way, which mustn't end up in the cache.
+        if cancelled():
+            return fps, measurements
+        measurementcache.save(processed_dir, video_path, params, measurements)
+    return fps, measurements
+
+class CameraRecorder:
+    # A further camera recorded next to the primary one, with its own capture and writer threads.
+    def __init__(self, cap, root, index, clock, fps=10, storage="csv", buffer_size=64, buffer_policy=BLOCK):
+        self.cap = cap
+        self.name = camera_name(index)
+        self.root = root
+        self.clock = clock
+        self.fps = fps
+        self.storage = storage
+        self.buffer = FrameBuffer(buffer_size, buffer_policy)
+        self.running = False
+        self.frames = 0
+        self.threads = []
+
+    def start(self):
+        size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        # The camera's own rate where it reports one, the primary camera's otherwise.
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        if not fps or fps <= 0 or math.isnan(fps):
+            fps = self.fps
+        self.out, video_file = videoio.open_writer(f"{self.root}_VIDEO_{self.name}", fps, size, "recording")
+        self.index = datastore.open_writer(f"{self.root}_FRAMES_{self.name}", ["Frame", "Elapsed Time [s]"], self.storage, ["{:.0f}", "{:.4f}"])
+        utils.log("Multi Camera", f"{self.name} Recording Started at {video_file}")
+
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self.capture_frames, daemon=True),
+            threading.Thread(target=self.write_frames, daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def capture_frames(self):
+        while self.running:
+            with instrumentation.span(f"record.cap_read_{self.name.lower()}"):
+                ret, frame = self.cap.read()
+            if not ret:
+                utils.log("Multi Camera", f"{self.name} stopped delivering frames")
+                break
+            self.buffer.put((self.clock(), frame))
+        self.buffer.close()
+
+    def write_frames(self):
+        while True:
+            item = self.buffer.get()
+            if item is None:
+                break
+            t, frame = item
+            self.out.write(frame)
+            self.index.writerow((self.frames, t))
+            self.frames += 1
+
+    def stop(self):
+        self.running = False
+        for thread in self.threads:
+            thread.join()
+        self.cap.release()
+        self.out.release()
+        self.index.close()
+        if self.buffer.dropped:
+            utils.log("Multi Camera", f"{self.name} dropped {self.buffer.dropped} frames")
+        utils.log("Multi Camera", f"{self.name} recorded {self.frames} frames")
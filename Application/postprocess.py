@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+import os, utils, datastore
+
+# Turns the measured per-frame diameters and the recorded pressure into the processed series in one
+# vectorised pass: frames are placed on the recording's clock, dropouts interpolated, the diameter
+# optionally smoothed and calibrated, and stress taken against the first pressure sample and strain
+# against a robust diameter reference.
+
+DEFAULT_POSTPROCESS = {
+    "filter": None,
+    "window": 5,
+    "polyorder": 2,
+    "mm_per_px": None,
+    "reference": 5
+}
+FILTERS = (None, "median", "savgol")
+
+def pressure_path(csv_path):
+    # The raw _PRESSURE log recorded alongside a _DATA file, if there is one.
+    root, ext = os.path.splitext(csv_path)
+    if not root.upper().endswith("_DATA"):
+        return None
+    for candidate_ext in (ext, ".csv", datastore.CHUNKED_EXT):
+        path = root[:-len("_DATA")] + "_PRESSURE" + candidate_ext
+        if os.path.exists(path):
+            return path
+    return None
+
+def frame_times(data_times, frames, fps):
+    # Recordings write one _DATA row per frame with its capture time. When the counts disagree the
+    # rows can't be trusted to line up, so the video's own frame rate places the frames instead.
+    if len(data_times) == frames:
+        return np.asarray(data_times, dtype=float)
+    utils.log("Post Processing", f"{frames} frames against {len(data_times)} data rows, aligning by frame rate")
+    start = data_times[0] if len(data_times) else 0.0
+    return start + np.arange(frames) / (fps if fps and fps > 0 else 10.0)
+
+def interpolate_dropouts(times, diameters):
+    # Frames without a measurement, or with a non-positive one, are interpolated from their neighbours.
+    diameters = np.asarray(diameters, dtype=float)
+    valid = np.isfinite(diameters) & (diameters > 0)
+    if not valid.any():
+        return np.zeros_like(diameters), 0
+    if valid.all():
+        return diameters, 0
+    return np.interp(times, times[valid], diameters[valid]), int((~valid).sum())
+
+def odd_window(window, minimum=1):
+    window = max(int(window), minimum)
+    return window if window % 2 else window + 1
+
+def rolling_median(values, window):
+    window = odd_window(window)
+    if window == 1 or len(values) == 0:
+        return values
+    padded = np.pad(values, window // 2, mode="edge")
+    return np.median(np.lib.stride_tricks.sliding_window_view(padded, window), axis=1)
+
+def savgol_coefficients(window, polyorder):
+    # Least-squares polynomial fit over the window, evaluated at its centre.
+    half = window // 2
+    vander = np.vander(np.arange(-half, half + 1, dtype=float), polyorder + 1, increasing=True)
+    return np.linalg.pinv(vander)[0]
+
+def savgol(values, window, polyorder=2):
+    window = odd_window(window, polyorder + 2)
+    if len(values) == 0:
+        return values
+    padded = np.pad(values, window // 2, mode="edge")
+    return np.convolve(padded, savgol_coefficients(window, polyorder)[::-1], mode="valid")
+
+def smooth(values, settings=DEFAULT_POSTPROCESS):
+    name = settings["filter"]
+    if name == "median":
+        return rolling_median(values, settings["window"])
+    if name == "savgol":
+        return savgol(values, settings["window"], settings["polyorder"])
+    if name is not None:
+        raise ValueError(f"Unknown filter: {name}")
+    return values
+
+def reference(values, count):
+    # Median of the first few diameters, so one noisy first frame doesn't shift the whole strain series.
+    return float(np.median(values[:max(1, count)])) if len(values) else 0.0
+
+def strain_from(diameters, D0):
+    # Relative change against the reference diameter, zero without a usable reference.
+    diameters = np.asarray(diameters, dtype=float)
+    return (diameters - D0) / D0 if D0 > 0 else np.zeros_like(diameters)
+
+def compliance(strain, stress, minimum_fraction=0.01):
+    # Strain per unit stress, left out (NaN) near zero stress where the ratio only amplifies noise.
+    strain, stress = np.asarray(strain, dtype=float), np.asarray(stress, dtype=float)
+    minimum = minimum_fraction * np.abs(stress).max() if len(stress) else 0.0
+    defined = np.abs(stress) > max(minimum, 1e-9)
+    return np.divide(strain, stress, out=np.full_like(strain, np.nan), where=defined)
+
+def postprocess(data, diameters, fps, settings=DEFAULT_POSTPROCESS, pressure=None):
+    # data is the _DATA table, diameters one value per video frame (None or NaN for a dropout),
+    # pressure an optional higher-rate (time, pressure) table to interpolate from instead of the rows.
+    # The result is indexed by video frame, so frames dropped outside the pressure record can be told apart.
+    settings = dict(DEFAULT_POSTPROCESS, **settings)
+    diameters = np.array([np.nan if d is None else d for d in diameters], dtype=float)
+    data_times = data["Elapsed Time [s]"].to_numpy(dtype=float)
+    times = frame_times(data_times, len(diameters), fps)
+
+    source = pressure if pressure is not None and len(pressure) > 1 else data
+    pressure_times = source["Elapsed Time [s]"].to_numpy(dtype=float)
+    pressure_values = source["Pressure [kPa]"].to_numpy(dtype=float)
+    finite = np.isfinite(pressure_times) & np.isfinite(pressure_values)
+    pressure_times, pressure_values = pressure_times[finite], pressure_values[finite]
+    if len(pressure_times) == 0:
+        raise ValueError("No pressure samples to align the frames with")
+
+    # Frames outside the recorded pressure are dropped rather than extrapolated.
+    tolerance = 0.5 / fps if fps and fps > 0 else 0.0
+    inside = (times >= pressure_times[0] - tolerance) & (times <= pressure_times[-1] + tolerance)
+    times, diameters = times[inside], diameters[inside]
+    pressures = np.interp(times, pressure_times, pressure_values)
+
+    diameters, filled = interpolate_dropouts(times, diameters)
+    if filled:
+        utils.log("Post Processing", f"Interpolated {filled} of {len(diameters)} frames without a diameter")
+    diameters = smooth(diameters, settings)
+
+    # Stress starts at zero as before, only the diameter, which is measured per frame, needs the robust reference.
+    P0 = pressures[0] if len(pressures) else 0.0
+    D0 = reference(diameters, settings["reference"])
+    stress = pressures - P0
+    strain = strain_from(diameters, D0)
+
+    columns = {
+        "Elapsed Time [s]": times.round(3),
+        "Pressure [kPa]": pressures.round(2),
+        "Diameter [px]": diameters.round(2)
+    }
+    if settings["mm_per_px"]:
+        columns["Diameter [mm]"] = (diameters * settings["mm_per_px"]).round(4)
+    columns["Stress [kPa]"] = stress.round(5)
+    columns["Strain"] = strain.round(5)
+    return pd.DataFrame(columns, index=np.flatnonzero(inside))
+
+def merge_views(df, primary, views, settings=DEFAULT_POSTPROCESS):
+    # df from postprocess() for the primary view, views [(name, times, diameters)] for the others on the
+    # same clock. Every view is brought onto the primary frames, the overall diameter is their mean.
+    settings = dict(DEFAULT_POSTPROCESS, **settings)
+    times = df["Elapsed Time [s]"].to_numpy(dtype=float)
+    diameters = {primary: df["Diameter [px]"].to_numpy(dtype=float)}
+    for name, view_times, view_diameters in views:
+        view_times = np.asarray(view_times, dtype=float)
+        values = np.array([np.nan if d is None else d for d in view_diameters], dtype=float)
+        values, filled = interpolate_dropouts(view_times, values)
+        if filled:
+            utils.log("Post Processing", f"Interpolated {filled} of {len(values)} {name} frames without a diameter")
+        diameters[name] = np.interp(times, view_times, smooth(values, settings)) if len(values) else np.zeros_like(times)
+
+    mean = np.mean(list(diameters.values()), axis=0)
+    columns = {
+        "Elapsed Time [s]": df["Elapsed Time [s]"],
+        "Pressure [kPa]": df["Pressure [kPa]"],
+        "Diameter [px]": mean.round(2)
+    }
+    for name, values in diameters.items():
+        columns[f"Diameter {name} [px]"] = values.round(2)
+    if settings["mm_per_px"]:
+        columns["Diameter [mm]"] = (mean * settings["mm_per_px"]).round(4)
+    columns["Stress [kPa]"] = df["Stress [kPa]"]
+
+    for name, values in [(None, mean)] + list(diameters.items()):
+        strain = strain_from(values, reference(values, settings["reference"]))
+        columns["Strain" if name is None else f"Strain {name}"] = strain.round(5)
+    return pd.DataFrame(columns, index=df.index)
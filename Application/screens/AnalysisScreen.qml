@@ -14,12 +14,23 @@ Item {
     property string csvFilePath: ""
     property string videoFilePath: ""
     property bool filesReady: csvFilePath === "" && videoFilePath === ""
+    property bool analysing: false
+    property string progressStage: ""
+    property real progressFraction: 0
+    property real progressEta: -1
+
+    function formatEta(seconds) {
+        if (seconds < 0) return ""
+        var s = Math.round(seconds)
+        return s >= 60 ? Math.floor(s / 60) + "m " + (s % 60) + "s left" : s + "s left"
+    }
 
     Label {
         text: "Select the folder with the video and data files:"
+        visible: progressStage === ""
         anchors {
             top: parent.top
-            topMargin: 250
+            topMargin: 265
             horizontalCenter: parent.horizontalCenter
         }
         font {
@@ -28,6 +39,184 @@ Item {
         }
     }
 
+    Column {
+        spacing: 8
+        enabled: !analysing
+        anchors {
+            top: parent.top
+            topMargin: 110
+            horizontalCenter: parent.horizontalCenter
+        }
+
+        Row {
+            spacing: 20
+            anchors.horizontalCenter: parent.horizontalCenter
+
+            Repeater {
+                model: [
+                    { name: "csv", label: "Data" },
+                    { name: "plots", label: "Plots" },
+                    { name: "video", label: "Annotated Video" },
+                    { name: "combined", label: "Combined Video" }
+                ]
+
+                CheckBox {
+                    text: modelData.label
+                    checked: true
+                    font {
+                        family: Theme.fontFamily
+                        pointSize: Theme.watermarkSize
+                    }
+                    onToggled: Analysis.set_output(modelData.name, checked)
+                }
+            }
+        }
+
+        Row {
+            spacing: 20
+            anchors.horizontalCenter: parent.horizontalCenter
+
+            Label {
+                text: "Video Size"
+                color: Theme.altTextColor
+                anchors.verticalCenter: parent.verticalCenter
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+            }
+
+            ComboBox {
+                width: 110
+                model: ["100%", "75%", "50%", "25%"]
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+                onActivated: Analysis.set_video_scale(parseInt(currentText) / 100)
+            }
+
+            Label {
+                text: "Plot DPI"
+                color: Theme.altTextColor
+                anchors.verticalCenter: parent.verticalCenter
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+            }
+
+            ComboBox {
+                width: 110
+                model: ["300", "150", "100"]
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+                onActivated: Analysis.set_plot_dpi(parseInt(currentText))
+            }
+
+            Label {
+                text: "Graph Every"
+                color: Theme.altTextColor
+                anchors.verticalCenter: parent.verticalCenter
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+            }
+
+            ComboBox {
+                width: 110
+                model: ["1", "2", "5", "10"]
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+                onActivated: Analysis.set_graph_every(parseInt(currentText))
+            }
+
+            Label {
+                text: "Smoothing"
+                color: Theme.altTextColor
+                anchors.verticalCenter: parent.verticalCenter
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+            }
+
+            ComboBox {
+                width: 150
+                textRole: "label"
+                valueRole: "name"
+                model: [
+                    { name: "none", label: "None" },
+                    { name: "median", label: "Median" },
+                    { name: "savgol", label: "Savitzky-Golay" }
+                ]
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+                onActivated: Analysis.set_filter(currentValue)
+            }
+
+            Label {
+                text: "mm/px"
+                color: Theme.altTextColor
+                anchors.verticalCenter: parent.verticalCenter
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+            }
+
+            TextField {
+                width: 80
+                placeholderText: "px"
+                validator: DoubleValidator { bottom: 0 }
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+                onEditingFinished: Analysis.set_calibration(text === "" ? 0 : Number(text))
+            }
+        }
+
+        Row {
+            spacing: 20
+            anchors.horizontalCenter: parent.horizontalCenter
+
+            CheckBox {
+                text: "Burst Windows"
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+                onToggled: Analysis.set_windowed(checked)
+            }
+
+            CheckBox {
+                text: "Edge Tracking"
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+                onToggled: Analysis.set_tracking(checked)
+            }
+
+            CheckBox {
+                text: "Keep Frames"
+                font {
+                    family: Theme.fontFamily
+                    pointSize: Theme.watermarkSize
+                }
+                onToggled: Analysis.set_frame_store(checked)
+            }
+        }
+    }
+
     Button {
         id: folderButton
         width: 250; height: 70
@@ -49,7 +238,7 @@ Item {
     Button {
         id: startButton
         width: 225; height: 75
-        text: "Start"
+        text: analysing ? "Cancel" : "Start"
         enabled: !filesReady
         anchors {
             bottom: parent.bottom
@@ -60,10 +249,94 @@ Item {
             family: Theme.fontFamily
             pointSize: Theme.buttonSize
         }
-        onClicked: Analysis.run_analysis(csvFilePath, videoFilePath)
+        onClicked: analysing ? Analysis.cancel_analysis() : Analysis.run_analysis(csvFilePath, videoFilePath)
         HoverHandler { cursorShape: Qt.PointingHandCursor }
     }
 
+    Column {
+        spacing: 4
+        visible: progressStage !== ""
+        anchors {
+            top: parent.top
+            topMargin: 265
+            horizontalCenter: parent.horizontalCenter
+        }
+
+        ProgressBar {
+            width: 400
+            value: progressFraction
+        }
+
+        Label {
+            text: progressStage + " " + Math.round(progressFraction * 100) + "%  " + formatEta(progressEta)
+            color: Theme.altTextColor
+            anchors.horizontalCenter: parent.horizontalCenter
+            font {
+                family: Theme.fontFamily
+                pointSize: Theme.watermarkSize
+            }
+        }
+    }
+
+    Column {
+        spacing: 4
+        anchors {
+            left: startButton.right
+            leftMargin: 40
+            verticalCenter: startButton.verticalCenter
+        }
+
+        Label {
+            text: "Workers"
+            color: Theme.altTextColor
+            font {
+                family: Theme.fontFamily
+                pointSize: Theme.watermarkSize
+            }
+        }
+
+        SpinBox {
+            id: workersBox
+            from: 1; to: 32
+            value: 1
+            enabled: !analysing
+            font {
+                family: Theme.fontFamily
+                pointSize: Theme.watermarkSize
+            }
+            onValueModified: Analysis.set_workers(value)
+        }
+    }
+
+    Column {
+        spacing: 4
+        anchors {
+            right: startButton.left
+            rightMargin: 40
+            verticalCenter: startButton.verticalCenter
+        }
+
+        Label {
+            text: "Data Format"
+            color: Theme.altTextColor
+            font {
+                family: Theme.fontFamily
+                pointSize: Theme.watermarkSize
+            }
+        }
+
+        ComboBox {
+            width: 140
+            model: ["csv", "parquet", "feather", "npz"]
+            enabled: !analysing
+            font {
+                family: Theme.fontFamily
+                pointSize: Theme.watermarkSize
+            }
+            onActivated: Analysis.set_output_format(currentText)
+        }
+    }
+
     Button {
         width: 80; height: 90
         anchors {
@@ -76,6 +349,7 @@ Item {
             source: "themes/images/back.png"
             height: 40; width: 40
         }
+        enabled: !analysing
         onClicked: { goToMainScreen() }
         HoverHandler { cursorShape: Qt.PointingHandCursor }
     }
@@ -84,5 +358,11 @@ Item {
 	target: Analysis
         function onVideoUpdated(file) { videoFilePath = file }
         function onCsvUpdated(file) { csvFilePath = file }
+        function onRunningChanged(running) { analysing = running }
+        function onProgressUpdated(stage, fraction, eta) {
+            progressStage = stage
+            progressFraction = fraction
+            progressEta = eta
+        }
     }
 }
\ No newline at end of file
@@ -38,6 +38,201 @@ Item {
         }
     }
 
+    Label {
+        id: bufferIndicator
+        text: "Buffer: N/A"
+        color: Theme.altTextColor
+        opacity: 0.8
+        anchors {
+            top: parent.top
+            topMargin: 240
+            horizontalCenter: parent.horizontalCenter
+        }
+        font {
+            family: Theme.fontFamily
+            pointSize: Theme.watermarkSize
+        }
+    }
+
+    Column {
+        spacing: 4
+        enabled: !startButton.checked
+        anchors {
+            left: parent.left
+            leftMargin: 20
+            top: parent.top
+            topMargin: 150
+        }
+
+        ComboBox {
+            id: sourceBox
+            width: 200; height: 45
+            model: ["Hardware", "Replay..."]
+            font {
+                family: Theme.fontFamily
+                pointSize: Theme.watermarkSize
+            }
+            onActivated: currentIndex === 0 ? Services.use_hardware() : Services.select_replay()
+        }
+
+        ComboBox {
+            width: 200; height: 45
+            visible: sourceBox.currentIndex === 1
+            model: ["1x", "2x", "5x", "10x"]
+            font {
+                family: Theme.fontFamily
+                pointSize: Theme.watermarkSize
+            }
+            onActivated: Services.set_replay_speed(parseFloat(currentText))
+        }
+
+        ComboBox {
+            id: camerasBox
+            width: 200; height: 45
+            visible: sourceBox.currentIndex === 0
+            model: ["1 Camera", "2 Cameras", "3 Cameras"]
+            font {
+                family: Theme.fontFamily
+                pointSize: Theme.watermarkSize
+            }
+            onActivated: Services.set_cameras(currentIndex + 1)
+        }
+
+        Label {
+            id: sourceIndicator
+            text: "Hardware"
+            color: Theme.altTextColor
+            font {
+                family: Theme.fontFamily
+                pointSize: Theme.watermarkSize
+            }
+        }
+    }
+
+    ComboBox {
+        id: storageBox
+        width: 200; height: 45
+        model: ["csv", "binary"]
+        enabled: !startButton.checked
+        anchors {
+            right: parent.right
+            rightMargin: 20
+            bottom: liveBox.top
+            bottomMargin: 4
+        }
+        font {
+            family: Theme.fontFamily
+            pointSize: Theme.watermarkSize
+        }
+        onActivated: Services.set_storage(currentText)
+    }
+
+    CheckBox {
+        id: liveBox
+        text: "Live analysis"
+        enabled: !startButton.checked
+        anchors {
+            right: parent.right
+            rightMargin: 20
+            bottom: policyBox.top
+            bottomMargin: 4
+        }
+        font {
+            family: Theme.fontFamily
+            pointSize: Theme.watermarkSize
+        }
+        onToggled: Services.set_live_analysis(checked)
+    }
+
+    Canvas {
+        id: livePlot
+        visible: liveBox.checked
+        width: 260; height: 160
+        anchors {
+            right: parent.right
+            rightMargin: 20
+            top: parent.top
+            topMargin: 150
+        }
+
+        property var times: []
+        property var pressures: []
+        property var strains: []
+        property int maxPoints: 300
+
+        function addPoint(t, pressure, strain) {
+            times.push(t); pressures.push(pressure); strains.push(strain)
+            if (times.length > maxPoints) {
+                times.shift(); pressures.shift(); strains.shift()
+            }
+            requestPaint()
+        }
+
+        function clear() {
+            times = []; pressures = []; strains = []
+            requestPaint()
+        }
+
+        function drawSeries(ctx, values, color) {
+            var lo = Math.min.apply(null, values), hi = Math.max.apply(null, values)
+            var t0 = times[0], span = Math.max(times[times.length - 1] - t0, 1e-6)
+            ctx.strokeStyle = color
+            ctx.lineWidth = 2
+            ctx.beginPath()
+            for (var i = 0; i < values.length; i++) {
+                var x = (times[i] - t0) / span * width
+                var y = height - (hi > lo ? (values[i] - lo) / (hi - lo) : 0.5) * (height - 20) - 10
+                if (i === 0) ctx.moveTo(x, y); else ctx.lineTo(x, y)
+            }
+            ctx.stroke()
+        }
+
+        onPaint: {
+            var ctx = getContext("2d")
+            ctx.clearRect(0, 0, width, height)
+            ctx.strokeStyle = Theme.altTextColor
+            ctx.lineWidth = 1
+            ctx.strokeRect(0, 0, width, height)
+            if (times.length < 2) return
+            drawSeries(ctx, pressures, "orange")
+            drawSeries(ctx, strains, "deepskyblue")
+        }
+    }
+
+    Label {
+        id: liveIndicator
+        visible: liveBox.checked
+        text: "Pressure / Strain"
+        color: Theme.altTextColor
+        anchors {
+            top: livePlot.bottom
+            topMargin: 4
+            horizontalCenter: livePlot.horizontalCenter
+        }
+        font {
+            family: Theme.fontFamily
+            pointSize: Theme.watermarkSize
+        }
+    }
+
+    ComboBox {
+        id: policyBox
+        width: 200; height: 45
+        model: ["block", "drop_oldest", "drop_overlays"]
+        enabled: !startButton.checked
+        anchors {
+            right: parent.right
+            rightMargin: 20
+            bottom: parent.bottom
+            bottomMargin: 20
+        }
+        font {
+            family: Theme.fontFamily
+            pointSize: Theme.watermarkSize
+        }
+        onActivated: Services.set_buffer_policy(currentText)
+    }
+
     TextField {
         id: nameField
         width: 300; height: 55
@@ -73,6 +268,7 @@ Item {
         }
         onCheckedChanged: {
             if (checked) {
+                livePlot.clear()
                 Services.start(nameField.text)
             } else {
                 Services.stop()
@@ -100,7 +296,15 @@ Item {
     Connections {
         target: Services
         function onPressureUpdated(connected) { pressureIndicator.text = "Pressure: " + (connected ? "Connected" : "Disconnected") }
+        function onSourceUpdated(source) { sourceIndicator.text = source }
         function onRelayUpdated(connected) { relayIndicator.text = "Relay: " + (connected ? "Connected" : "Disconnected") }
         function onConnected(connected) { startButton.enabled = connected }
+        function onLiveUpdated(t, pressure, diameter, strain) {
+            livePlot.addPoint(t, pressure, strain)
+            liveIndicator.text = "P: " + pressure.toFixed(1) + "kPa | D: " + diameter.toFixed(1) + "px | ε: " + strain.toFixed(4)
+        }
+        function onBufferUpdated(depth, capacity, dropped, overlaysDropped) {
+            bufferIndicator.text = "Buffer: " + depth + "/" + capacity + " | Dropped: " + dropped + " frames, " + overlaysDropped + " overlays"
+        }
     }
 }
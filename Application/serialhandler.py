@@ -1,71 +1,140 @@
-import serial, random, re, utils
+import serial, random, re, threading, time, utils
+
+NUMBER = re.compile(rb"[-+]?\d*\.\d+|[-+]?\d+")
+
+def parse_value(line):
+    # Fast path for lines that are just a number, regex for anything with labels or units.
+    try:
+        return float(line)
+    except ValueError:
+        nums = NUMBER.findall(line)
+        return float(nums[-1]) if nums else None
 
 class SerialHandler:
-    def __init__(self, port, baudrate, timeout=1):
+    def __init__(self, port, baudrate, timeout=1, stale_after=2.0):
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
+        self.stale_after = stale_after
         self.connection = None
+        self.pending = bytearray()
+        self.last_rx = None
+
+        # Every operation on the port holds the lock, so the monitor and the recording never interleave.
+        self.lock = threading.RLock()
 
     def connect(self):
-        if not self.connection:
-            try:
-                self.connection = serial.Serial(self.port, self.baudrate, timeout=self.timeout)
-                utils.log("Serial Handler", f"Successfully connected to {self.port} at {self.baudrate}")
-            except:
-                self.drop()
-                utils.log("Serial Handler", f"Failed to connect to {self.port} at {self.baudrate}")
+        with self.lock:
+            if not self.connection:
+                try:
+                    self.connection = serial.Serial(self.port, self.baudrate, timeout=self.timeout)
+                    utils.log("Serial Handler", f"Successfully connected to {self.port} at {self.baudrate}")
+                except:
+                    self.drop()
+                    utils.log("Serial Handler", f"Failed to connect to {self.port} at {self.baudrate}")
 
     def disconnect(self):
-        if self.connection:
-            self.drop()
-            utils.log("Serial Handler", f"Disconnected from {self.port} at {self.baudrate}")
+        with self.lock:
+            if self.connection:
+                self.drop()
+                utils.log("Serial Handler", f"Disconnected from {self.port} at {self.baudrate}")
 
     def send(self, command):
-        if self.is_connected:
-            try:
-                self.connection.write(command.encode())
-                utils.log("Serial Handler", f"Sent Command: {command} to {self.port} at {self.baudrate}")
-            except:
-                self.drop()
+        with self.lock:
+            if self.is_open:
+                try:
+                    self.connection.write(command.encode())
+                    utils.log("Serial Handler", f"Sent Command: {command} to {self.port} at {self.baudrate}")
+                except:
+                    self.drop()
 
     def read(self):
-        if self.is_connected:
+        with self.lock:
+            if self.is_open:
+                try:
+                    raw = self.connection.readline()
+                    if raw:
+                        self.last_rx = time.perf_counter()
+                    return parse_value(raw.strip())
+                except:
+                    self.drop()
+                    utils.log("Serial Handler", f"Failed to read {self.port} at {self.baudrate}")
+                    return None
+
+    def read_batch(self):
+        # Pulls everything the port has buffered and returns [(perf_counter time, value), ...].
+        with self.lock:
+            if not self.is_open:
+                return []
             try:
-                raw = self.connection.readline()
-                line = raw.decode("utf-8", errors="ignore").strip()
-                nums = re.findall(r"[-+]?\d*\.\d+|[-+]?\d+", line)
-                return float(nums[-1]) if nums else None
+                # Blocks up to the timeout for the first byte so callers don't spin on an idle line.
+                data = self.connection.read(self.connection.in_waiting or 1)
             except:
                 self.drop()
                 utils.log("Serial Handler", f"Failed to read {self.port} at {self.baudrate}")
-                return None
-        
+                return []
+
+            if not data:
+                return []
+
+            now = time.perf_counter()
+            previous = self.last_rx if self.last_rx is not None else now
+            self.last_rx = now
+
+            self.pending += data
+            *lines, rest = self.pending.split(b"\n")
+            self.pending = bytearray(rest)
+
+        values = [v for v in (parse_value(line.strip()) for line in lines if line.strip()) if v is not None]
+
+        # Lines arriving in one chunk are spread evenly since the previous chunk rather than sharing one stamp.
+        count = len(values)
+        return [(previous + (now - previous) * (i + 1) / count, value) for i, value in enumerate(values)]
+
     def drop(self):
-        try:
-            if self.connection:
-                self.connection.close()
-        except:
-            pass
-        self.connection = None
+        with self.lock:
+            try:
+                if self.connection:
+                    self.connection.close()
+            except:
+                pass
+            self.connection = None
+            self.pending = bytearray()
+            self.last_rx = None
+
+    @property
+    def is_open(self):
+        return bool(self.connection and self.connection.is_open)
+
+    @property
+    def is_alive(self):
+        # Passive liveness: the port is open and has delivered data recently, nothing is written.
+        return self.is_open and self.last_rx is not None and time.perf_counter() - self.last_rx < self.stale_after
+
+    def probe(self):
+        # Active check for devices that never send anything (the relay), writes a single byte.
+        with self.lock:
+            if not self.is_open:
+                return False
+            try:
+                self.connection.write(b"\x01")
+                return True
+            except:
+                self.drop()
+                return False
 
     @property
     def is_connected(self):
-        if not self.connection or not self.connection.is_open:
-            return False
-        try:
-            self.connection.write(b"\x01")
-            return True
-        except:
-            self.drop()
-            return False
+        return self.is_open
 
 
 class MockSerialHandler:
-    def __init__(self, name="Mock", should_connect=True):
+    def __init__(self, name="Mock", should_connect=True, rate=100):
         self.name = name
         self.should_connect = should_connect
         self.connected = False
+        self.rate = rate
+        self.last_rx = None
 
     def connect(self):
         if not self.connected and self.should_connect:
@@ -81,10 +150,35 @@ class MockSerialHandler:
         if self.connected:
             utils.log("Mock Serial Handler", f"Sent Command: {command}")
 
+    def probe(self):
+        return self.connected
+
     def read(self):
         if self.connected:
             return random.uniform(0.0, 16.0)
-    
+
+    def read_batch(self):
+        if not self.connected:
+            return []
+
+        # Emulates a transducer streaming at a fixed rate.
+        now = time.perf_counter()
+        if self.last_rx is None:
+            self.last_rx = now
+        time.sleep(max(0.0, self.last_rx + 0.01 - now))
+        now = time.perf_counter()
+        count = max(1, int((now - self.last_rx) * self.rate))
+        previous, self.last_rx = self.last_rx, now
+        return [(previous + (now - previous) * (i + 1) / count, random.uniform(0.0, 16.0)) for i in range(count)]
+
+    @property
+    def is_open(self):
+        return self.connected
+
+    @property
+    def is_alive(self):
+        return self.connected
+
     @property
     def is_connected(self):
         return self.connected
@@ -1,23 +1,46 @@
 import time, os, utils
-from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtWidgets import QFileDialog
 from serialhandler import SerialHandler, MockSerialHandler
+from framebuffer import BLOCK, POLICIES
+from connectionmonitor import ConnectionMonitor
 
 class ServiceHandler(QObject):
     pressureUpdated = Signal(bool)
     relayUpdated = Signal(bool)
     connected = Signal(bool)
+    bufferUpdated = Signal(int, int, int, int)
+    liveUpdated = Signal(float, float, float, float)
+    sourceUpdated = Signal(str)
 
     def __init__(self):
         super().__init__()
 
         self.relay = SerialHandler("COM5", 9600)
         self.pressure = SerialHandler("COM4", 115200)
+        self.camera = 0
+        # Further cameras recorded alongside the primary one, device indices or replay sources.
+        self.cameras = []
+        self.camera_count = 1
+
+        # Replaying a recording instead of the camera, transducer and relay Arduino.
+        self.hardware = (self.relay, self.pressure)
+        self.replay_folder = None
+        self.simulation = {}
 
         self._pressure_last = False
         self._relay_last = False
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_connections)
+        self.buffer_size = 64
+        self.buffer_policy = BLOCK
+        self.live_analysis = False
+        self.storage = "csv"
+
+        # Connection checks and reconnects run on their own thread so a slow port never blocks the UI.
+        self.monitor = ConnectionMonitor(self.relay, self.pressure)
+        self.monitor.relayUpdated.connect(self.relayUpdated)
+        self.monitor.pressureUpdated.connect(self.pressureUpdated)
+        self.monitor.connected.connect(self.connected)
 
     @Slot(str)
     def start(self, prefix):
@@ -29,7 +52,16 @@ class ServiceHandler(QObject):
             pressure_handler = self.pressure,
             start_time = self.start_time,
             prefix = prefix,
-            fps = 10)
+            fps = 10,
+            buffer_size = self.buffer_size,
+            buffer_policy = self.buffer_policy,
+            live = self.live_analysis,
+            camera = self.camera,
+            cameras = self.cameras,
+            storage = self.storage)
+        self.worker.bufferUpdated.connect(self.bufferUpdated)
+        self.worker.liveUpdated.connect(self.liveUpdated)
+        self.monitor.set_acquiring(True)
         self.worker.start()
 
     @Slot()
@@ -38,6 +70,81 @@ class ServiceHandler(QObject):
         if hasattr(self, "worker"):
             self.worker.stop()
             self.worker.wait()
+            self.monitor.set_acquiring(False)
+            # A replay is used up by one recording, so the next one starts from the beginning again.
+            if self.replay_folder:
+                self.set_replay(self.replay_folder)
+
+    @Slot(str)
+    def set_buffer_policy(self, policy):
+        if policy not in POLICIES:
+            utils.log("Service Handler", f"Unknown buffer policy: {policy}")
+            return
+        self.buffer_policy = policy
+        utils.log("Service Handler", f"Buffer policy set to {policy}")
+
+    @Slot(bool)
+    def set_live_analysis(self, enabled):
+        self.live_analysis = enabled
+        utils.log("Service Handler", f"Live analysis {'enabled' if enabled else 'disabled'}")
+
+    @Slot(str)
+    def set_storage(self, storage):
+        if storage not in ("csv", "binary"):
+            utils.log("Service Handler", f"Unknown storage: {storage}")
+            return
+        self.storage = storage
+        utils.log("Service Handler", f"Recording storage set to {storage}")
+
+    @Slot()
+    def select_replay(self):
+        folder = QFileDialog.getExistingDirectory(None, "Select Recording to Replay", "data")
+        if folder:
+            self.set_replay(folder)
+
+    @Slot(str)
+    def set_replay(self, folder):
+        import simulator
+        try:
+            relay, pressure, camera = simulator.create(folder, self.simulation)
+            cameras = simulator.create_views(folder, self.simulation)
+        except Exception as e:
+            utils.log("Service Handler", f"Failed to load replay: {e}")
+            return
+
+        self.relay, self.pressure, self.camera, self.cameras = relay, pressure, camera, cameras
+        self.monitor.set_devices(relay, pressure)
+        self.replay_folder = folder
+        utils.log("Service Handler", f"Replaying {folder}")
+        self.sourceUpdated.emit(f"Replay: {os.path.basename(folder)}")
+
+    @Slot(float)
+    def set_replay_speed(self, speed):
+        self.simulation = dict(self.simulation, speed=speed)
+        utils.log("Service Handler", f"Replay speed set to {speed:g}x")
+        # The replay sources are single use, so they are rebuilt with the new speed.
+        if self.replay_folder:
+            self.set_replay(self.replay_folder)
+
+    @Slot(int)
+    def set_cameras(self, count):
+        # Hardware cameras are the first `count` device indices, a replay brings its own views.
+        self.camera_count = max(1, count)
+        if self.replay_folder is None:
+            self.cameras = list(range(1, self.camera_count))
+        utils.log("Service Handler", f"Recording from {self.camera_count} cameras")
+
+    @Slot()
+    def use_hardware(self):
+        if self.replay_folder is None:
+            return
+        self.relay, self.pressure = self.hardware
+        self.monitor.set_devices(self.relay, self.pressure)
+        self.camera = 0
+        self.cameras = list(range(1, self.camera_count))
+        self.replay_folder = None
+        utils.log("Service Handler", "Using the camera and serial devices")
+        self.sourceUpdated.emit("Hardware")
 
     @Slot()
     def launch_camera(self):
@@ -48,21 +155,17 @@ class ServiceHandler(QObject):
 
     @Slot()
     def connect(self):
-        self.timer.start(1000)
+        # A monitor that is still shutting down finishes closing the ports first.
+        if self.monitor.isRunning() and not self.monitor.running:
+            self.monitor.wait()
+        if not self.monitor.isRunning():
+            self.monitor.start()
 
     @Slot()
     def disconnect(self):
-        self.timer.stop()
-        self.relay.disconnect()
-        self.pressure.disconnect()
-
-    def check_connections(self):
-        self.relay.connect()
-        self.pressure.connect()
-
-        r = self.relay.is_connected
-        p = self.pressure.is_connected
+        # The monitor closes the ports as it exits, so leaving the screen doesn't wait on them.
+        self.monitor.stop()
 
-        self.relayUpdated.emit(r)
-        self.pressureUpdated.emit(p)
-        self.connected.emit(p and r)
+    def shutdown(self):
+        self.monitor.stop()
+        self.monitor.wait()
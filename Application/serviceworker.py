@@ -1,74 +1,293 @@
-from PySide6.QtCore import QThread
-import math, cv2, csv, os, utils
+from PySide6.QtCore import QThread, Signal
+from collections import deque
+from framebuffer import FrameBuffer, BLOCK
+from measurement import DEFAULT_PARAMS, measure_frame
+from multicamera import CameraRecorder
+import numpy as np
+import math, cv2, os, queue, threading, time, utils, instrumentation, datastore, videoio
 
 class ServiceWorker(QThread):
-    def __init__(self, pressure_handler=None, start_time=None, prefix="Unlabeled", fps=10):
+    bufferUpdated = Signal(int, int, int, int)
+    liveUpdated = Signal(float, float, float, float)
+
+    def __init__(self, pressure_handler=None, start_time=None, prefix="Unlabeled", fps=10, buffer_size=64, buffer_policy=BLOCK, live=False, params=DEFAULT_PARAMS, camera=0, storage="csv", cameras=None):
         super().__init__()
         self.pressure_handler = pressure_handler
+        self.camera = camera
+        # Further views recorded alongside the primary camera, each on its own threads.
+        self.cameras = list(cameras or [])
+        self.storage = storage
         self.start_time = start_time
         self.prefix = prefix
         self.fps = fps
-        self.next_time = None
-        self.interval = 0.1
         self.running = False
 
+        # Camera and pressure run on their own threads, each stamping samples with perf_counter.
+        self.frames = queue.Queue(maxsize=max(1, fps) * 5)
+        self.samples = deque(maxlen=100000)
+        self.pressure_wait = 1.0 / max(1, fps)
+
+        # Encoding and disk I/O happen on a writer thread fed by a bounded buffer.
+        self.buffer = FrameBuffer(buffer_size, buffer_policy)
+        self.overlays_dropped = 0
+        self.stats_interval = 0.5
+
+        # Live measurement only ever holds the newest frame, older ones are dropped when it falls behind.
+        self.live = live
+        self.params = params
+        self.live_slot = None
+        self.live_lock = threading.Lock()
+        self.live_event = threading.Event()
+        self.live_dropped = 0
+        self.ui_interval = 0.2
+
     def start(self):
         self.running = True
-        self.next_time = self.interval
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
         super().start()
 
+    def elapsed(self):
+        return time.perf_counter() - self.start_time
+
+    def capture_frames(self, cap):
+        while self.running:
+            with instrumentation.span("record.cap_read"):
+                ret, frame = cap.read()
+            if not ret:
+                utils.log("Service Worker", "Camera stopped delivering frames")
+                break
+            self.frames.put((self.elapsed(), frame))
+            instrumentation.count("record.frames_captured")
+        self.frames.put(None)
+
+    def sample_pressure(self, raw_writer):
+        # Batched reads log every sample the transducer sends, not just one per frame.
+        while self.running:
+            with instrumentation.span("record.pressure_read"):
+                batch = self.pressure_handler.read_batch()
+            if not batch:
+                if not self.pressure_handler.is_open:
+                    time.sleep(0.01)
+                continue
+
+            for stamp, value in batch:
+                sample = (stamp - self.start_time, value * 6.89476)
+                self.samples.append(sample)
+                raw_writer.writerow(sample)
+            instrumentation.count("record.pressure_samples", len(batch))
+
+    def pressure_alive(self):
+        return self.pressure_handler is not None and self.pressure_handler.is_alive
+
+    def pressure_at(self, t, history):
+        # Wait briefly for a sample after t so the value is interpolated rather than held, but only while
+        # samples are arriving and never for more than a frame, so capture never waits on the serial side.
+        deadline = time.perf_counter() + self.pressure_wait
+        while True:
+            while self.samples:
+                history.append(self.samples.popleft())
+            if (history and history[-1][0] >= t) or time.perf_counter() > deadline or not self.running or not self.pressure_alive():
+                break
+            time.sleep(0.002)
+
+        # Without a newer sample the last known value is held, 0 before the first one.
+        if not history:
+            return 0.0
+
+        # Only keep the samples still needed to interpolate later frames.
+        while len(history) > 2 and history[1][0] < t:
+            history.popleft()
+
+        times = [s[0] for s in history]
+        values = [s[1] for s in history]
+        return float(np.interp(t, times, values))
+
+    def write_frames(self, out, writer):
+        while True:
+            item = self.buffer.get()
+            if item is None:
+                break
+
+            t, pressure, frame = item
+
+            # Overlay
+            if self.buffer.behind:
+                self.overlays_dropped += 1
+                instrumentation.count("record.overlays_dropped")
+            else:
+                with instrumentation.span("record.overlay"):
+                    cv2.putText(frame, f"Time: {t:.1f}s", (10, frame.shape[0]-30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                    cv2.putText(frame, f"Pressure: {pressure:.2f}kPa", (10, frame.shape[0]-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+            with instrumentation.span("record.out_write"):
+                out.write(frame)
+            with instrumentation.span("record.csv_write"):
+                writer.writerow((t, pressure))
+            instrumentation.count("record.frames_written")
+
+    def offer_live(self, t, pressure, frame):
+        with self.live_lock:
+            if self.live_slot is not None:
+                self.live_dropped += 1
+            self.live_slot = (t, pressure, frame.copy())
+        self.live_event.set()
+
+    def analyse_live(self, processed_file):
+        # Imported here rather than at the top so pandas loads on this thread, not while capture starts.
+        from postprocess import DEFAULT_POSTPROCESS, reference, strain_from
+        writer = datastore.open_writer(
+            processed_file,
+            ["Elapsed Time [s]", "Pressure [kPa]", "Diameter [px]", "Stress [kPa]", "Strain"],
+            self.storage,
+            ["{:.3f}", "{:.2f}", "{:.2f}", "{:.5f}", "{:.5f}"])
+        utils.log("Service Worker", f"Live Analysis Started at {writer.path}")
+
+        # The same references as the offline post-processing: the first pressure and the median of the first
+        # few diameters. Rows are held back until those diameters are in, so every row uses the final reference.
+        count = DEFAULT_POSTPROCESS["reference"]
+        pending = []
+        P0, D0 = None, None
+        last_emit = -self.ui_interval
+
+        def write(rows):
+            for t, pressure, diameter in rows:
+                strain = float(strain_from(diameter, D0))
+                writer.writerow((t, pressure, diameter, pressure - P0, strain))
+            return strain
+
+        while self.running or self.live_slot is not None:
+            self.live_event.wait(0.1)
+            with self.live_lock:
+                item, self.live_slot = self.live_slot, None
+                self.live_event.clear()
+            if item is None:
+                continue
+
+            t, pressure, frame = item
+            with instrumentation.span("record.live_measure"):
+                diameter, _ = measure_frame(frame, self.params)
+            if diameter is None:
+                continue
+
+            rows = [(t, pressure, diameter)]
+            if D0 is None:
+                pending += rows
+                if len(pending) < count:
+                    continue
+                P0, D0 = pending[0][1], reference([d for _, _, d in pending], count)
+                rows, pending = pending, []
+            strain = write(rows)
+
+            # Downsampled to a bounded UI rate.
+            if t - last_emit >= self.ui_interval:
+                self.liveUpdated.emit(t, pressure, diameter, strain)
+                last_emit = t
+
+        # Recordings shorter than the reference still get their rows.
+        if pending:
+            P0, D0 = pending[0][1], reference([d for _, _, d in pending], count)
+            write(pending)
+        writer.close()
+
+    def report_buffer(self):
+        self.bufferUpdated.emit(self.buffer.depth, self.buffer.capacity, self.buffer.dropped, self.overlays_dropped)
+
     def run(self):
         folder = f"data/{self.prefix}_{utils.timestamp()}"
         os.makedirs(folder, exist_ok=True)
 
-        video_file = f"{folder}/{self.prefix}_VIDEO.mp4"
-        csv_file = f"{folder}/{self.prefix}_DATA.csv"
-        
-        csvf = open(csv_file, "w", newline="")
-        writer = csv.writer(csvf)
-        writer.writerow(["Elapsed Time [s]", "Pressure [kPa]"])
+        # Text CSVs round to the old precision, binary storage keeps full float64.
+        columns = ["Elapsed Time [s]", "Pressure [kPa]"]
+        writer = datastore.open_writer(f"{folder}/{self.prefix}_DATA", columns, self.storage, ["{:.3f}", "{:.2f}"])
+        raw_writer = datastore.open_writer(f"{folder}/{self.prefix}_PRESSURE", columns, self.storage, ["{:.4f}", "{:.3f}"])
+        csv_file, pressure_file = writer.path, raw_writer.path
 
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            utils.log("Service Worker", "No camera found")
+        # A device index or file path, or any object with the VideoCapture read/get/release interface.
+        caps = [camera if hasattr(camera, "read") else videoio.open_capture(camera) for camera in [self.camera] + self.cameras]
+        cap = caps[0]
+        if not all(c.isOpened() for c in caps):
+            utils.log("Service Worker", "No camera found" if len(caps) == 1 else f"Only {sum(c.isOpened() for c in caps)} of {len(caps)} cameras found")
+            for c in caps:
+                c.release()
+            writer.close()
+            raw_writer.close()
             return
 
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
-        out = cv2.VideoWriter(
-            video_file,
-            cv2.VideoWriter_fourcc(*"mp4v"),
-            self.fps,
-            (width, height))
+        # Capture is no longer paced by the pressure reads, so use the camera's own rate if it reports one.
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if not fps or fps <= 0 or math.isnan(fps):
+            fps = self.fps
+        self.pressure_wait = 1.0 / fps
+
+        # Intra-frame codec, so writing keeps up with the camera and analysis can seek to any frame.
+        # With more than one camera every view is named after its camera, the primary one being CAM1.
+        suffix = "_CAM1" if len(caps) > 1 else ""
+        out, video_file = videoio.open_writer(f"{folder}/{self.prefix}_VIDEO{suffix}", fps, (width, height), "recording")
+        recorders = [CameraRecorder(c, f"{folder}/{self.prefix}", index, self.elapsed, fps, self.storage, self.buffer.capacity, self.buffer.policy) for index, c in enumerate(caps[1:], 1)]
 
         utils.log("Service Worker", f"Video Recording Started at {video_file}")
         utils.log("Service Worker", f"CSV Recording Started at {csv_file}")
+        utils.log("Service Worker", f"Pressure Recording Started at {pressure_file}")
 
-        while self.running:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        camera_thread = threading.Thread(target=self.capture_frames, args=(cap,), daemon=True)
+        pressure_thread = threading.Thread(target=self.sample_pressure, args=(raw_writer,), daemon=True)
+        writer_thread = threading.Thread(target=self.write_frames, args=(out, writer), daemon=True)
+        camera_thread.start()
+        pressure_thread.start()
+        writer_thread.start()
+        for recorder in recorders:
+            recorder.start()
 
-            pressure = self.pressure_handler.read()
+        live_thread = None
+        if self.live:
+            os.makedirs(f"{folder}/processed", exist_ok=True)
+            # Its own name, so analysing the recording afterwards doesn't overwrite it.
+            processed_file = f"{folder}/processed/{self.prefix}_DATA_LIVE"
+            live_thread = threading.Thread(target=self.analyse_live, args=(processed_file,), daemon=True)
+            live_thread.start()
 
-            if pressure is None:
-                pressure = 0.0
+        # Frames are aligned to the pressure series by their capture timestamps before being handed to the writer.
+        history = deque()
+        last_report = 0.0
+        while True:
+            item = self.frames.get()
+            if item is None:
+                break
 
-            pressure *= 6.89476
+            t, frame = item
+            with instrumentation.span("record.align"):
+                pressure = self.pressure_at(t, history)
+            if self.live:
+                self.offer_live(t, pressure, frame)
+            self.buffer.put((t, pressure, frame))
 
-            # Overlay
-            cv2.putText(frame, f"Time: {self.next_time:.1f}s", (10, frame.shape[0]-30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            cv2.putText(frame, f"Pressure: {pressure:.2f}kPa", (10, frame.shape[0]-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            if t - last_report >= self.stats_interval:
+                self.report_buffer()
+                last_report = t
 
-            out.write(frame)
-            writer.writerow([f"{self.next_time:.1f}", f"{pressure:.2f}"])
+        self.running = False
+        self.buffer.close()
+        camera_thread.join()
+        pressure_thread.join(timeout=2)
+        writer_thread.join()
+        for recorder in recorders:
+            recorder.stop()
+        if live_thread:
+            live_thread.join()
+            utils.log("Service Worker", f"Live Analysis skipped {self.live_dropped} frames to keep up")
+        self.report_buffer()
 
-            self.next_time += self.interval
+        if self.buffer.dropped or self.overlays_dropped:
+            utils.log("Service Worker", f"Dropped {self.buffer.dropped} frames and {self.overlays_dropped} overlays (peak buffer {self.buffer.high_water}/{self.buffer.capacity})")
 
         cap.release()
         out.release()
-        csvf.close()
+        writer.close()
+        raw_writer.close()
 
         utils.log("Service Worker", "Recording Stopped")
 
@@ -0,0 +1,292 @@
+import numpy as np
+import argparse, cv2, glob, json, os, tempfile, time, utils, datastore, videoio
+from multicamera import view_paths
+
+# Replay backend for the recording path: a recorded _VIDEO file stands in for the camera, the recorded
+# pressure for the transducer and a simulated Arduino for the relays. Timing follows the recording,
+# sped up by `speed`, with optional serial latency, jitter and scheduled disconnects.
+
+KPA_PER_PSI = 6.89476
+
+DEFAULT_SIMULATION = {
+    "speed": 1.0,
+    "latency": 0.0,
+    "jitter": 0.0,
+    "disconnect_every": 0.0,
+    "disconnect_for": 0.0,
+    "seed": 0
+}
+
+def find_replay(folder):
+    # The recording's own _DATA and _VIDEO files, preferring the raw _PRESSURE log for the transducer.
+    def first(pattern):
+        paths = sorted(glob.glob(os.path.join(folder, pattern)))
+        return paths[0] if paths else None
+
+    video_path = first("*_VIDEO.avi") or first("*_VIDEO.mp4") or first("*_VIDEO_CAM1.avi") or first("*_VIDEO_CAM1.mp4")
+    data_path = first("*_PRESSURE.csv") or first(f"*_PRESSURE{datastore.CHUNKED_EXT}") or first("*_DATA.csv") or first(f"*_DATA{datastore.CHUNKED_EXT}")
+    return data_path, video_path
+
+class ReplayCamera:
+    # Stands in for the camera capture, delivering the recording's frames at its own rate times speed.
+    def __init__(self, video_path, speed=1.0, loop=False):
+        self.vid = videoio.open_capture(video_path)
+        self.speed = speed
+        self.loop = loop
+        self.fps = self.vid.get(cv2.CAP_PROP_FPS) or 10.0
+        self.count = 0
+        self.started = None
+
+    def isOpened(self):
+        return self.vid.isOpened()
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps * self.speed
+        return self.vid.get(prop)
+
+    def read(self):
+        ret, frame = self.vid.read()
+        if not ret and self.loop:
+            self.vid.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.vid.read()
+        if not ret:
+            return False, None
+
+        if self.started is None:
+            self.started = time.perf_counter()
+        delay = self.started + self.count / (self.fps * self.speed) - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.count += 1
+        return True, frame
+
+    def release(self):
+        self.vid.release()
+
+class SimulatedPort:
+    # Connection state shared by the simulated devices, including the scheduled outages.
+    simulated = True
+
+    def __init__(self, name, simulation=DEFAULT_SIMULATION):
+        self.name = name
+        self.simulation = dict(DEFAULT_SIMULATION, **simulation)
+        self.connected = False
+        self.connected_at = None
+        self.last_rx = None
+
+    def in_outage(self):
+        every, length = self.simulation["disconnect_every"], self.simulation["disconnect_for"]
+        if every <= 0 or length <= 0 or self.connected_at is None:
+            return False
+        return (time.perf_counter() - self.connected_at) % (every + length) >= every
+
+    def connect(self):
+        if self.connected:
+            return
+        # Reconnecting during an outage fails like a missing COM port would.
+        if self.connected_at is not None and self.in_outage():
+            utils.log("Simulator", f"Failed to connect to {self.name}")
+            return
+        self.connected = True
+        if self.connected_at is None:
+            self.connected_at = time.perf_counter()
+        utils.log("Simulator", f"Connected to {self.name}")
+
+    def disconnect(self):
+        if self.connected:
+            self.connected = False
+            utils.log("Simulator", f"Disconnected from {self.name}")
+
+    def drop(self):
+        if self.connected:
+            self.connected = False
+            self.last_rx = None
+            utils.log("Simulator", f"{self.name} dropped the connection")
+
+    @property
+    def is_open(self):
+        if self.connected and self.in_outage():
+            self.drop()
+        return self.connected
+
+    def probe(self):
+        return self.is_open
+
+    @property
+    def is_alive(self):
+        return self.is_open
+
+    @property
+    def is_connected(self):
+        return self.is_open
+
+class ReplaySerialHandler(SimulatedPort):
+    # Replays a recorded pressure series as the transducer, in psi like the real device.
+    def __init__(self, data_path, simulation=DEFAULT_SIMULATION, name="Replay Pressure"):
+        super().__init__(name, simulation)
+        table = datastore.load_table(data_path)
+        times = table["Elapsed Time [s]"].to_numpy(dtype=float)
+        self.times = times - times[0] if len(times) else times
+        self.values = table["Pressure [kPa]"].to_numpy(dtype=float) / KPA_PER_PSI
+
+        # Arrival offsets: replay time plus latency and seeded jitter, kept in order like a serial line.
+        delays = np.random.default_rng(self.simulation["seed"]).uniform(0.0, self.simulation["jitter"], len(self.times))
+        self.offsets = np.maximum.accumulate(self.times / self.simulation["speed"] + self.simulation["latency"] + delays)
+        self.index = 0
+        self.origin = None
+
+    def connect(self):
+        super().connect()
+        # Whatever was sent while disconnected is lost, as on the real line.
+        if self.connected and self.origin is not None:
+            self.index = max(self.index, int(np.searchsorted(self.offsets, time.perf_counter() - self.origin)))
+
+    def send(self, command):
+        pass
+
+    def read(self):
+        batch = self.read_batch()
+        return batch[-1][1] if batch else None
+
+    def read_batch(self):
+        if not self.is_open or self.index >= len(self.offsets):
+            time.sleep(0.01)
+            return []
+
+        now = time.perf_counter()
+        if self.origin is None:
+            self.origin = now
+
+        # Block briefly for the next sample like a serial read with a timeout.
+        wait = self.origin + self.offsets[self.index] - now
+        if wait > 0:
+            time.sleep(min(wait, 0.05))
+            now = time.perf_counter()
+
+        end = int(np.searchsorted(self.offsets, now - self.origin, side="right"))
+        if self.in_outage():
+            self.drop()
+            return []
+
+        batch = [(self.origin + self.offsets[i], float(self.values[i])) for i in range(self.index, end)]
+        self.index = max(self.index, end)
+        if batch:
+            self.last_rx = batch[-1][0]
+        return batch
+
+class SimulatedRelay(SimulatedPort):
+    # The RelayManager Arduino: '1' opens the relays, '2' closes them, anything else is ignored.
+    def __init__(self, simulation=DEFAULT_SIMULATION, name="Simulated Relay"):
+        super().__init__(name, simulation)
+        self.relays_open = False
+        self.commands = []
+
+    def send(self, command):
+        if not self.is_open:
+            return
+        time.sleep(self.simulation["latency"])
+        self.commands.append((time.perf_counter(), command))
+        if command == "1":
+            self.relays_open = True
+        elif command == "2":
+            self.relays_open = False
+        else:
+            utils.log("Simulator", f"{self.name} ignored command {command!r}")
+            return
+        utils.log("Simulator", f"Relays {'opened' if self.relays_open else 'closed'}")
+
+    def read_batch(self):
+        return []
+
+def create(folder, simulation=DEFAULT_SIMULATION):
+    # (relay, pressure, camera) replaying the recording in folder.
+    data_path, video_path = find_replay(folder)
+    if not data_path or not video_path:
+        raise FileNotFoundError(f"No _VIDEO and _DATA/_PRESSURE recording in {folder}")
+    simulation = dict(DEFAULT_SIMULATION, **simulation)
+    return SimulatedRelay(simulation), ReplaySerialHandler(data_path, simulation), ReplayCamera(video_path, simulation["speed"])
+
+def create_views(folder, simulation=DEFAULT_SIMULATION):
+    # Replay cameras for the further views of a multi-camera recording, empty for a single camera.
+    _, video_path = find_replay(folder)
+    if not video_path:
+        return []
+    simulation = dict(DEFAULT_SIMULATION, **simulation)
+    return [ReplayCamera(path, simulation["speed"]) for _, path in view_paths(video_path)[1:]]
+
+def stress_test(folder, seconds, simulation=DEFAULT_SIMULATION, buffer_policy="block", storage="csv"):
+    from serviceworker import ServiceWorker
+    relay, pressure, camera = create(os.path.abspath(folder), simulation)
+    cameras = create_views(os.path.abspath(folder), simulation)
+
+    # The recording loop writes under ./data, so it runs inside a scratch folder.
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            relay.connect()
+            pressure.connect()
+            relay.send("1")
+            worker = ServiceWorker(pressure_handler=pressure, prefix="Replay", buffer_policy=buffer_policy, camera=camera, storage=storage, cameras=cameras)
+
+            started = time.perf_counter()
+            worker.start()
+            reconnects = 0
+            while time.perf_counter() - started < seconds and worker.isRunning():
+                time.sleep(0.1)
+                if not pressure.is_open:
+                    pressure.connect()
+                    reconnects += pressure.is_open
+            worker.stop()
+            worker.wait()
+            relay.send("2")
+            elapsed = time.perf_counter() - started
+
+            folder = os.path.join("data", sorted(os.listdir("data"))[-1])
+            data = datastore.load_table(glob.glob(os.path.join(folder, "Replay_DATA.*"))[0])
+            samples = datastore.load_table(glob.glob(os.path.join(folder, "Replay_PRESSURE.*"))[0])
+        finally:
+            os.chdir(cwd)
+
+    gaps = np.diff(samples["Elapsed Time [s]"].to_numpy()) if len(samples) > 1 else np.array([0.0])
+    return {
+        "seconds": round(elapsed, 3),
+        "simulation": simulation,
+        "frames": len(data),
+        "fps": round(len(data) / elapsed, 1),
+        "pressure_samples": len(samples),
+        "pressure_hz": round(len(samples) / elapsed, 1),
+        "max_pressure_gap_s": round(float(gaps.max()), 4),
+        "dropped_frames": worker.buffer.dropped,
+        "overlays_dropped": worker.overlays_dropped,
+        "reconnects": reconnects,
+        "relay_commands": [command for _, command in relay.commands]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recording through the recording path without any hardware.")
+    parser.add_argument("folder", help="recording folder with _VIDEO and _DATA/_PRESSURE files")
+    parser.add_argument("-t", "--seconds", type=float, default=10.0, help="how long to record")
+    parser.add_argument("-x", "--speed", type=float, default=1.0, help="replay speed, 2 plays the recording twice as fast")
+    parser.add_argument("--latency", type=float, default=0.0, help="serial latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random serial delay, up to this many seconds")
+    parser.add_argument("--disconnect-every", type=float, default=0.0, help="seconds between simulated disconnects")
+    parser.add_argument("--disconnect-for", type=float, default=0.0, help="length of each disconnect in seconds")
+    parser.add_argument("--policy", default="block", help="frame buffer policy")
+    parser.add_argument("--storage", choices=("csv", "binary"), default="csv", help="recording storage")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the jitter")
+    args = parser.parse_args()
+
+    simulation = {
+        "speed": args.speed,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "disconnect_every": args.disconnect_every,
+        "disconnect_for": args.disconnect_for,
+        "seed": args.seed
+    }
+    print(json.dumps(stress_test(args.folder, args.seconds, simulation, args.policy, args.storage), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import numpy as np
+import cv2, csv, os, time, videoio
+
+# Synthetic test rig: a dark tube on a light background whose diameter follows a known profile.
+
+def diameter_profile(frames, base=0.3, growth=0.25, burst_at=0.9):
+    # Diameter as a fraction of the frame height, inflating slowly until the burst then collapsing.
+    t = np.linspace(0.0, 1.0, frames)
+    profile = base * (1 + growth * np.minimum(t, burst_at) / burst_at)
+    profile[t > burst_at] = base * 0.8
+    return profile
+
+def pressure_profile(frames, peak=200.0, burst_at=0.9):
+    # Slow pressurisation in kPa followed by a sharp drop at the burst.
+    t = np.linspace(0.0, 1.0, frames)
+    pressure = peak * np.minimum(t, burst_at) / burst_at
+    pressure[t > burst_at] = 0.0
+    return pressure
+
+def render_frame(size, diameter, noise=8, seed=None):
+    width, height = size
+    frame = np.full((height, width, 3), 200, dtype=np.uint8)
+    half = diameter * height / 2
+    centre = height / 2
+    cv2.rectangle(frame, (0, int(round(centre - half))), (width - 1, int(round(centre + half))), (60, 60, 60), -1)
+    if noise:
+        rng = np.random.default_rng(seed)
+        frame = cv2.add(frame, rng.integers(0, noise, frame.shape, dtype=np.uint8))
+    return frame
+
+def generate_video(path, frames, size=(640, 480), fps=10, profile=None, use="recording"):
+    # Returns the path written, whose extension follows the codec videoio picks.
+    profile = diameter_profile(frames) if profile is None else profile
+    out, path = videoio.open_writer(path, fps, size, use)
+    for i, diameter in enumerate(profile):
+        out.write(render_frame(size, diameter, seed=i))
+    out.release()
+    return path
+
+def generate_csv(path, frames, fps=10, pressures=None):
+    pressures = pressure_profile(frames) if pressures is None else pressures
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Elapsed Time [s]", "Pressure [kPa]"])
+        for i, pressure in enumerate(pressures):
+            writer.writerow([f"{(i + 1) / fps:.3f}", f"{pressure:.2f}"])
+    return pressures
+
+def generate_recording(folder, prefix="Synthetic", frames=100, size=(640, 480), fps=10, cameras=1):
+    # Same layout ServiceWorker produces: <folder>/<prefix>_VIDEO.avi and <prefix>_DATA.csv. With more
+    # cameras the views are _VIDEO_CAM1.. and each further view deforms a little more than the last,
+    # with its own _FRAMES_CAMk index of capture times slightly offset from the primary camera's.
+    os.makedirs(folder, exist_ok=True)
+    csv_path = os.path.join(folder, f"{prefix}_DATA.csv")
+    suffix = "_CAM1" if cameras > 1 else ""
+    video_path = generate_video(os.path.join(folder, f"{prefix}_VIDEO{suffix}"), frames, size, fps)
+    generate_csv(csv_path, frames, fps)
+
+    for index in range(1, cameras):
+        name = f"CAM{index + 1}"
+        generate_video(os.path.join(folder, f"{prefix}_VIDEO_{name}"), frames, size, fps, diameter_profile(frames, growth=0.25 + 0.1 * index))
+        with open(os.path.join(folder, f"{prefix}_FRAMES_{name}.csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Frame", "Elapsed Time [s]"])
+            for i in range(frames):
+                writer.writerow([i, f"{(i + 1) / fps + 0.01 * index:.4f}"])
+    return csv_path, video_path
+
+class SyntheticCamera:
+    # Stands in for cv2.VideoCapture in the recording loop.
+    def __init__(self, size=(640, 480), fps=30, frames=None, realtime=True):
+        self.size = size
+        self.fps = fps
+        self.frames = frames
+        self.realtime = realtime
+        self.count = 0
+        self.started = None
+        self.profile = diameter_profile(frames or 1000)
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.size[0],
+            cv2.CAP_PROP_FRAME_HEIGHT: self.size[1],
+            cv2.CAP_PROP_FPS: self.fps
+        }.get(prop, 0)
+
+    def read(self):
+        if not self.opened or (self.frames is not None and self.count >= self.frames):
+            return False, None
+
+        # Paced like a real camera unless running flat out.
+        if self.realtime:
+            if self.started is None:
+                self.started = time.perf_counter()
+            delay = self.started + self.count / self.fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        diameter = self.profile[self.count % len(self.profile)]
+        self.count += 1
+        return True, render_frame(self.size, diameter, noise=0)
+
+    def release(self):
+        self.opened = False
@@ -0,0 +1,70 @@
+import cv2, os, utils
+
+# Codec and container choices per use, first one the local OpenCV/FFmpeg build can open wins.
+#   recording  intra-frame MJPG, cheap to write and every frame is a keyframe for seeking
+#   output     compact H.264 where the build has an encoder for it, mp4v otherwise
+CODECS = {
+    "recording": [("MJPG", ".avi"), ("mp4v", ".mp4")],
+    "output": [("avc1", ".mp4"), ("mp4v", ".mp4")]
+}
+VIDEO_EXTS = (".avi", ".mp4")
+
+# Decoder threads, 0 lets FFmpeg pick one per core.
+DECODE_THREADS = 0
+
+# Codecs found not to work in this process, so they are only probed once.
+unavailable = set()
+
+def acceleration_params(writer=False):
+    # Hardware acceleration where available, FFmpeg silently falls back to the CPU otherwise.
+    if writer:
+        return [cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+    return [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY, cv2.CAP_PROP_N_THREADS, DECODE_THREADS]
+
+def open_writer(path, fps, size, use="output"):
+    # Returns (writer, path), the extension of path is replaced by the chosen container.
+    root = os.path.splitext(path)[0]
+    for fourcc, ext in CODECS[use]:
+        if fourcc in unavailable:
+            continue
+        candidate = root + ext
+        writer = cv2.VideoWriter(candidate, cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*fourcc), fps, size, acceleration_params(writer=True))
+        if not writer.isOpened():
+            writer = cv2.VideoWriter(candidate, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if writer.isOpened():
+            return writer, candidate
+
+        writer.release()
+        if os.path.exists(candidate):
+            os.remove(candidate)
+        unavailable.add(fourcc)
+        utils.log("Video IO", f"{fourcc} is not available, using the next codec")
+    raise RuntimeError(f"No video codec available for {path}")
+
+def open_capture(source):
+    # Files get threaded, possibly accelerated decoding. Devices and anything else go through as is.
+    if isinstance(source, str):
+        vid = cv2.VideoCapture(source, cv2.CAP_FFMPEG, acceleration_params())
+        if vid.isOpened():
+            return vid
+        vid.release()
+    return cv2.VideoCapture(source)
+
+def seek(vid, path, index):
+    # Frame-accurate seek: the next read() returns frame `index`. Returns the capture to use from here on,
+    # which is a fresh one read forward from the start if the container can't seek exactly.
+    if index <= 0 and vid.get(cv2.CAP_PROP_POS_FRAMES) == 0:
+        return vid
+    if vid.set(cv2.CAP_PROP_POS_FRAMES, index) and int(vid.get(cv2.CAP_PROP_POS_FRAMES)) == index:
+        return vid
+
+    utils.log("Video IO", f"Inexact seek to frame {index}, reading forward instead")
+    vid.release()
+    vid = open_capture(path)
+    for _ in range(index):
+        if not vid.grab():
+            break
+    return vid
+
+def is_video(path):
+    return path.lower().endswith(VIDEO_EXTS)